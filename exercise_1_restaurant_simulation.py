@@ -22,6 +22,8 @@ Output:
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from scipy import stats
+from scipy.signal import fftconvolve
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
@@ -39,6 +41,21 @@ COST_PER_UNIT = 3.50
 DEMAND_VALUES = np.array([0, 1, 2, 3, 4, 5, 6])
 DEMAND_PROBABILITIES = np.array([0.05, 0.10, 0.20, 0.30, 0.20, 0.10, 0.05])
 
+# Newsvendor (pre-cooked stock per hour)
+SALVAGE_VALUE = 0.50  # value recovered per leftover hamburger
+NUM_DEMAND_SCENARIOS = 1_000_000
+
+# Replication engine
+NUM_REPLICATIONS = 1000
+CONFIDENCE_LEVEL = 0.95
+MAX_BLOCK_CELLS = 10_000_000  # demand cells per block (bounds peak memory)
+
+# Streaming mode
+STREAM_CHUNK_HOURS = 1_000_000  # hours generated per chunk
+
+# Exact (FFT) distribution of totals
+QUANTILE_LEVELS = np.array([0.01, 0.05, 0.25, 0.50, 0.75, 0.95, 0.99])
+
 # Output paths
 OUTPUT_DIR = Path("output/problema1")
 CSV_PATH = OUTPUT_DIR / "problema1_simulacion.csv"
@@ -48,7 +65,85 @@ EXCEL_PATH = OUTPUT_DIR / "problema1_simulacion.xlsx"
 # SIMULATION FUNCTIONS
 # ============================================================================
 
-def generate_demand(size=1, seed=None):
+def build_alias_table(values, probabilities):
+    """
+    Build a Walker/Vose alias table for a discrete distribution.
+    
+    Construction is O(K) and done once; afterwards every draw costs one
+    uniform index, one uniform coin and two table lookups, regardless of
+    the number of support points K.
+    
+    Parameters:
+    -----------
+    values : np.ndarray
+        Support points
+    probabilities : np.ndarray
+        Probability (or unnormalized weight) of each support point
+        
+    Returns:
+    --------
+    dict
+        Sampler with values, prob (acceptance probabilities) and alias
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    num_points = len(probabilities)
+    scaled = (probabilities * num_points / probabilities.sum()).tolist()
+    
+    prob = np.ones(num_points)
+    alias = np.arange(num_points)
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    
+    # Pair each under-full column with an over-full donor
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    # Leftover columns are full up to round-off (prob = 1)
+    
+    return {
+        'values': np.asarray(values),
+        'prob': prob,
+        'alias': alias,
+    }
+
+
+def alias_sample(sampler, size, rng=None):
+    """
+    Draw samples from an alias table in one vectorized batch.
+    
+    Parameters:
+    -----------
+    sampler : dict
+        Table from build_alias_table()
+    size : int or tuple
+        Output shape
+    rng : np.random.Generator, optional
+        Random number generator; the global NumPy state if None
+        
+    Returns:
+    --------
+    np.ndarray
+        Sampled values
+    """
+    num_points = len(sampler['prob'])
+    if rng is None:
+        column = np.random.randint(0, num_points, size)
+        coin = np.random.random_sample(size)
+    else:
+        column = rng.integers(0, num_points, size)
+        coin = rng.random(size)
+    index = np.where(coin < sampler['prob'][column], column, sampler['alias'][column])
+    return sampler['values'][index]
+
+
+def generate_demand(size=1, seed=None, sampler=None):
     """
     Generate demand using discrete distribution.
     
@@ -58,6 +153,9 @@ def generate_demand(size=1, seed=None):
         Number of samples to generate
     seed : int, optional
         Random seed for reproducibility
+    sampler : dict, optional
+        Alias table from build_alias_table() for an arbitrary demand PMF;
+        defaults to DEMAND_VALUES / DEMAND_PROBABILITIES
         
     Returns:
     --------
@@ -66,6 +164,8 @@ def generate_demand(size=1, seed=None):
     """
     if seed is not None:
         np.random.seed(seed)
+    if sampler is not None:
+        return alias_sample(sampler, size)
     return np.random.choice(DEMAND_VALUES, size=size, p=DEMAND_PROBABILITIES)
 
 
@@ -106,27 +206,498 @@ def run_simulation():
     np.random.seed(RANDOM_SEED)
     demands = generate_demand(size=NUM_HOURS, seed=RANDOM_SEED)
     
-    # Calculate metrics for each hour
-    results = []
-    for hour in range(1, NUM_HOURS + 1):
-        demand = demands[hour - 1]
-        revenue, cost, utility = calculate_metrics(demand)
-        
-        results.append({
-            'Hora': hour,
-            'Demanda': demand,
-            'Precio_Unitario': PRICE_PER_UNIT,
-            'Costo_Unitario': COST_PER_UNIT,
-            'Ingreso': revenue,
-            'Costo_Total': cost,
-            'Utilidad': utility
-        })
-    
-    df = pd.DataFrame(results)
+    # Calculate metrics for all hours at once
+    revenue, cost, utility = calculate_metrics(demands)
+    
+    df = pd.DataFrame({
+        'Hora': np.arange(1, NUM_HOURS + 1),
+        'Demanda': demands,
+        'Precio_Unitario': PRICE_PER_UNIT,
+        'Costo_Unitario': COST_PER_UNIT,
+        'Ingreso': revenue,
+        'Costo_Total': cost,
+        'Utilidad': utility,
+    })
     
     return df
 
 
+def generate_demand_matrix(num_replications, num_hours, rng, sampler=None):
+    """
+    Generate an R × H matrix of hourly demand.
+    
+    Parameters:
+    -----------
+    num_replications : int
+        Number of replications (rows)
+    num_hours : int
+        Hours per replication (columns)
+    rng : np.random.Generator
+        Random number generator
+    sampler : dict, optional
+        Alias table for an arbitrary demand PMF
+        
+    Returns:
+    --------
+    np.ndarray
+        Demand matrix of shape (num_replications, num_hours)
+    """
+    if sampler is not None:
+        return alias_sample(sampler, (num_replications, num_hours), rng)
+    return rng.choice(DEMAND_VALUES, size=(num_replications, num_hours), p=DEMAND_PROBABILITIES)
+
+
+def run_replications(num_replications=NUM_REPLICATIONS, num_hours=NUM_HOURS,
+                     confidence=CONFIDENCE_LEVEL, seed=RANDOM_SEED, sampler=None):
+    """
+    Run many independent replications of the restaurant as array operations.
+    
+    Replications are processed in blocks of whole rows so that a block
+    holds at most MAX_BLOCK_CELLS demand cells; within a block revenue,
+    cost and utility come from calculate_metrics() on the row sums.
+    
+    Parameters:
+    -----------
+    num_replications : int
+        Number of replications R
+    num_hours : int
+        Hours per replication H
+    confidence : float
+        Confidence level for the mean hourly utility
+    seed : int
+        Random seed
+    sampler : dict, optional
+        Alias table for an arbitrary demand PMF
+        
+    Returns:
+    --------
+    tuple
+        (pd.DataFrame with one row of totals per replication,
+         dict with the CI on mean hourly utility)
+    """
+    rng = np.random.default_rng(seed)
+    block_rows = max(1, MAX_BLOCK_CELLS // num_hours)
+    
+    total_demand = np.empty(num_replications)
+    demand_sq_sum = np.empty(num_replications)
+    for start in range(0, num_replications, block_rows):
+        stop = min(start + block_rows, num_replications)
+        demand = generate_demand_matrix(stop - start, num_hours, rng, sampler)
+        total_demand[start:stop] = demand.sum(axis=1)
+        demand_sq_sum[start:stop] = np.square(demand).sum(axis=1)
+        
+    revenue, cost, utility = calculate_metrics(total_demand)
+    margin = PRICE_PER_UNIT - COST_PER_UNIT
+    mean_utility = utility / num_hours
+    if num_hours > 1:
+        demand_var = (demand_sq_sum - total_demand**2 / num_hours) / (num_hours - 1)
+    else:
+        demand_var = np.zeros(num_replications)
+        
+    df = pd.DataFrame({
+        'Replica': np.arange(1, num_replications + 1),
+        'Demanda_Total': total_demand,
+        'Ingreso_Total': revenue,
+        'Costo_Total': cost,
+        'Utilidad_Total': utility,
+        'Utilidad_Promedio_Hora': mean_utility,
+        'Utilidad_Std_Hora': margin * np.sqrt(np.maximum(demand_var, 0)),
+    })
+    
+    mean = mean_utility.mean()
+    t_value = stats.t.ppf((1 + confidence) / 2, num_replications - 1)
+    half_width = t_value * mean_utility.std(ddof=1) / np.sqrt(num_replications)
+    summary = {
+        'num_replications': num_replications,
+        'num_hours': num_hours,
+        'utilidad_promedio_hora': mean,
+        'ic_half_width': half_width,
+        'ic_inferior': mean - half_width,
+        'ic_superior': mean + half_width,
+        'utilidad_total_promedio': utility.mean(),
+        'utilidad_total_std': utility.std(ddof=1),
+    }
+    
+    return df, summary
+
+
+def convolution_power(pmf, n):
+    """
+    PMF of the sum of n i.i.d. copies by FFT convolution and repeated squaring.
+    
+    Only O(log n) convolutions are needed. Round-off from the FFT is
+    removed by clipping negative values and renormalizing.
+    
+    Parameters:
+    -----------
+    pmf : np.ndarray
+        PMF on the integer grid 0, 1, ..., len(pmf) - 1
+    n : int
+        Number of summands (n >= 0)
+        
+    Returns:
+    --------
+    np.ndarray
+        PMF of the sum on 0, 1, ..., n * (len(pmf) - 1)
+    """
+    result = np.array([1.0])
+    base = np.asarray(pmf, dtype=float)
+    while n > 0:
+        if n & 1:
+            result = np.clip(fftconvolve(result, base), 0, None)
+            result /= result.sum()
+        n >>= 1
+        if n:
+            base = np.clip(fftconvolve(base, base), 0, None)
+            base /= base.sum()
+    return result
+
+
+def total_demand_distribution(num_hours=NUM_HOURS, values=DEMAND_VALUES,
+                              probabilities=DEMAND_PROBABILITIES,
+                              quantile_levels=QUANTILE_LEVELS):
+    """
+    Exact distribution of total demand and utility over num_hours.
+    
+    The hourly PMF is placed on the integer grid and raised to the
+    num_hours-th convolution power, so no sampling is involved.
+    Utility is the margin times total demand.
+    
+    Parameters:
+    -----------
+    num_hours : int
+        Horizon in hours
+    values : np.ndarray
+        Demand values (non-negative integers)
+    probabilities : np.ndarray
+        Probability of each demand value
+    quantile_levels : np.ndarray
+        Levels at which to report quantiles
+        
+    Returns:
+    --------
+    dict
+        demand and utility supports, pmf, cdf, mean, variance and
+        quantiles of total demand and total utility
+    """
+    values = np.asarray(values, dtype=np.int64)
+    hourly_pmf = np.bincount(values, weights=probabilities)
+    
+    pmf = convolution_power(hourly_pmf, num_hours)
+    demand = np.arange(len(pmf))
+    cdf = np.cumsum(pmf)
+    
+    margin = PRICE_PER_UNIT - COST_PER_UNIT
+    demand_mean = np.dot(demand, pmf)
+    demand_variance = np.dot(np.square(demand - demand_mean), pmf)
+    demand_quantiles = demand[np.minimum(np.searchsorted(cdf, quantile_levels), len(cdf) - 1)]
+    
+    return {
+        'num_hours': num_hours,
+        'demand': demand,
+        'utility': demand * margin,
+        'pmf': pmf,
+        'cdf': cdf,
+        'demand_mean': demand_mean,
+        'demand_variance': demand_variance,
+        'utility_mean': demand_mean * margin,
+        'utility_variance': demand_variance * margin**2,
+        'quantile_levels': np.asarray(quantile_levels),
+        'demand_quantiles': demand_quantiles,
+        'utility_quantiles': demand_quantiles * margin,
+    }
+
+
+def sensitivity_sweep(prices, costs, demand_pmfs=None, num_replications=NUM_REPLICATIONS,
+                      num_hours=NUM_HOURS, confidence=CONFIDENCE_LEVEL, seed=RANDOM_SEED):
+    """
+    Evaluate a grid of (price, cost, demand PMF) scenarios with common random numbers.
+    
+    One R × H matrix of uniforms is shared by every scenario and mapped
+    through each PMF's inverse CDF, so scenario differences are paired.
+    Because utility is linear in demand, only the mean demand per
+    replication is kept per PMF, and the scenario utilities come from
+    broadcasting the unit margins against it.
+    
+    Parameters:
+    -----------
+    prices : sequence of float
+        Prices per unit to evaluate
+    costs : sequence of float
+        Costs per unit to evaluate
+    demand_pmfs : dict, optional
+        Name -> probabilities over DEMAND_VALUES; defaults to the base PMF
+    num_replications : int
+        Number of replications R
+    num_hours : int
+        Hours per replication H
+    confidence : float
+        Confidence level
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    tuple
+        (pd.DataFrame with one row per scenario, dict with the S × S
+         matrices of paired mean differences and CI half-widths)
+    """
+    if demand_pmfs is None:
+        demand_pmfs = {'base': DEMAND_PROBABILITIES}
+    pmf_names = list(demand_pmfs)
+    cdfs = np.cumsum([demand_pmfs[name] for name in pmf_names], axis=1)
+    cdfs /= cdfs[:, -1:]
+    
+    # Mean hourly demand per (PMF, replication) from shared uniforms
+    rng = np.random.default_rng(seed)
+    block_rows = max(1, MAX_BLOCK_CELLS // num_hours)
+    mean_demand = np.empty((len(pmf_names), num_replications))
+    for start in range(0, num_replications, block_rows):
+        stop = min(start + block_rows, num_replications)
+        uniforms = rng.random((stop - start, num_hours))
+        for j, cdf in enumerate(cdfs):
+            demand = DEMAND_VALUES[np.minimum(np.searchsorted(cdf, uniforms, side='right'),
+                                              len(cdf) - 1)]
+            mean_demand[j, start:stop] = demand.mean(axis=1)
+            
+    # Scenario grid: price × cost × PMF, flattened in that order
+    price_grid, cost_grid, pmf_grid = np.meshgrid(np.asarray(prices, dtype=float),
+                                                  np.asarray(costs, dtype=float),
+                                                  np.arange(len(pmf_names)), indexing='ij')
+    price_grid, cost_grid, pmf_grid = price_grid.ravel(), cost_grid.ravel(), pmf_grid.ravel()
+    utility = (price_grid - cost_grid)[:, None] * mean_demand[pmf_grid]
+    
+    # Per-scenario CIs and paired differences from the S × S covariance
+    num_scenarios = len(price_grid)
+    t_value = stats.t.ppf((1 + confidence) / 2, num_replications - 1)
+    mean = utility.mean(axis=1)
+    covariance = np.atleast_2d(np.cov(utility))
+    variance = np.diag(covariance)
+    mean_diff = mean[:, None] - mean[None, :]
+    diff_variance = variance[:, None] + variance[None, :] - 2 * covariance
+    diff_half_width = t_value * np.sqrt(np.maximum(diff_variance, 0) / num_replications)
+    
+    table = pd.DataFrame({
+        'Escenario': np.arange(1, num_scenarios + 1),
+        'Precio_Unitario': price_grid,
+        'Costo_Unitario': cost_grid,
+        'Demanda_PMF': [pmf_names[j] for j in pmf_grid],
+        'Demanda_Promedio': mean_demand[pmf_grid].mean(axis=1),
+        'Utilidad_Promedio_Hora': mean,
+        'Utilidad_Std_Replica': np.sqrt(variance),
+        'IC_Half_Width': t_value * np.sqrt(variance / num_replications),
+        'Diferencia_vs_Base': mean_diff[:, 0],
+        'IC_Diferencia_Half_Width': diff_half_width[:, 0],
+    })
+    
+    return table, {'mean_diff': mean_diff, 'half_width': diff_half_width}
+
+
+def optimize_stock_level(stock_levels=None, num_scenarios=NUM_DEMAND_SCENARIOS,
+                         salvage_value=SALVAGE_VALUE, seed=RANDOM_SEED):
+    """
+    Choose how many hamburgers to pre-cook per hour (newsvendor model).
+    
+    Each stock level q is evaluated against the same demand scenarios
+    from generate_demand() in one broadcast (levels × scenarios):
+    profit = price·min(q, D) + salvage·(q - D)⁺ - cost·q. The analytic
+    optimum is the smallest q with F(q) ≥ (price - cost) / (price - salvage).
+    
+    Parameters:
+    -----------
+    stock_levels : np.ndarray, optional
+        Candidate stock levels; defaults to 0..max(DEMAND_VALUES)
+    num_scenarios : int
+        Number of simulated demand scenarios
+    salvage_value : float
+        Value recovered per leftover unit
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    tuple
+        (pd.DataFrame with one row per stock level, dict with the simulated
+         and critical-fractile optima)
+        
+    Raises:
+    -------
+    ValueError
+        If salvage_value is not below COST_PER_UNIT (the critical fractile
+        would not lie in [0, 1))
+    """
+    if salvage_value >= COST_PER_UNIT:
+        raise ValueError(f"salvage_value must be below COST_PER_UNIT = {COST_PER_UNIT}, "
+                         f"got {salvage_value}")
+    if stock_levels is None:
+        stock_levels = np.arange(DEMAND_VALUES.max() + 1)
+    stock_levels = np.asarray(stock_levels)
+    demand = generate_demand(size=num_scenarios, seed=seed)
+    
+    # Single batched evaluation of every stock level against every scenario
+    sold = np.minimum(stock_levels[:, None], demand[None, :])
+    lost_sales = demand[None, :] - sold
+    waste = stock_levels[:, None] - sold
+    profit = PRICE_PER_UNIT * sold + salvage_value * waste - COST_PER_UNIT * stock_levels[:, None]
+    
+    # Exact expectations from the demand PMF for the cross-check
+    exact_sold = np.minimum(stock_levels[:, None], DEMAND_VALUES[None, :]) @ DEMAND_PROBABILITIES
+    exact_profit = (PRICE_PER_UNIT - salvage_value) * exact_sold \
+        - (COST_PER_UNIT - salvage_value) * stock_levels
+        
+    table = pd.DataFrame({
+        'Inventario': stock_levels,
+        'Utilidad_Esperada': profit.mean(axis=1),
+        'Utilidad_Std': profit.std(axis=1, ddof=1),
+        'Ventas_Perdidas': lost_sales.mean(axis=1),
+        'Desperdicio': waste.mean(axis=1),
+        'Nivel_Servicio': (demand[None, :] <= stock_levels[:, None]).mean(axis=1),
+        'Utilidad_Exacta': exact_profit,
+    })
+    
+    critical_ratio = (PRICE_PER_UNIT - COST_PER_UNIT) / (PRICE_PER_UNIT - salvage_value)
+    cdf = np.cumsum(DEMAND_PROBABILITIES)
+    best = int(table['Utilidad_Esperada'].idxmax())
+    
+    summary = {
+        'inventario_optimo': stock_levels[best],
+        'utilidad_optima': table['Utilidad_Esperada'][best],
+        'ventas_perdidas_optimo': table['Ventas_Perdidas'][best],
+        'desperdicio_optimo': table['Desperdicio'][best],
+        'fractil_critico': critical_ratio,
+        'inventario_fractil_critico': DEMAND_VALUES[np.searchsorted(cdf, critical_ratio - 1e-12)],
+    }
+    
+    return table, summary
+
+
+def demand_chunks(num_hours, chunk_size=STREAM_CHUNK_HOURS, seed=RANDOM_SEED, sampler=None):
+    """
+    Yield hourly demand in chunks.
+    
+    Parameters:
+    -----------
+    num_hours : int
+        Total hours to generate
+    chunk_size : int
+        Hours per chunk
+    seed : int
+        Random seed
+    sampler : dict, optional
+        Alias table for an arbitrary demand PMF
+        
+    Yields:
+    -------
+    tuple
+        (first hour number of the chunk, demand array)
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_hours, chunk_size):
+        size = min(chunk_size, num_hours - start)
+        yield start + 1, generate_demand_matrix(1, size, rng, sampler)[0]
+
+
+def update_moments(acc, values):
+    """
+    Merge a chunk into running count, mean and M2 (Welford/Chan update).
+    
+    Parameters:
+    -----------
+    acc : dict
+        Accumulator with keys count, mean and m2
+    values : np.ndarray
+        New observations
+    """
+    count = len(values)
+    chunk_mean = values.mean()
+    chunk_m2 = np.square(values - chunk_mean).sum()
+    total = acc['count'] + count
+    delta = chunk_mean - acc['mean']
+    acc['mean'] += delta * count / total
+    acc['m2'] += chunk_m2 + delta**2 * acc['count'] * count / total
+    acc['count'] = total
+
+
+def run_streaming_simulation(num_hours=NUM_HOURS, chunk_size=STREAM_CHUNK_HOURS,
+                             seed=RANDOM_SEED, csv_path=None, sampler=None):
+    """
+    Run a long-horizon simulation in constant memory.
+    
+    Demand chunks from demand_chunks() feed Welford moments, running
+    min/max and an exact demand-count histogram (np.bincount); no
+    DataFrame is built unless per-hour rows are written to csv_path.
+    
+    Parameters:
+    -----------
+    num_hours : int
+        Horizon in hours
+    chunk_size : int
+        Hours per chunk
+    seed : int
+        Random seed
+    csv_path : Path, optional
+        If given, per-hour rows are appended to this CSV chunk by chunk
+    sampler : dict, optional
+        Alias table for an arbitrary demand PMF; its support must be
+        non-negative integers (integral floats such as 3.0 are accepted)
+        
+    Returns:
+    --------
+    dict
+        Same statistics as calculate_statistics() plus the demand
+        histogram (demand_counts, indexed by demand value)
+        
+    Raises:
+    -------
+    ValueError
+        If the sampler support is not made of non-negative integers
+    """
+    values = np.asarray(DEMAND_VALUES if sampler is None else sampler['values'])
+    if not (np.issubdtype(values.dtype, np.number) and np.all(values >= 0)
+            and np.all(np.mod(values, 1) == 0)):
+        raise ValueError("The streaming histogram is indexed by demand value: the sampler "
+                         f"support must be non-negative integers, got {values[:5]}")
+    
+    moments = {'count': 0, 'mean': 0.0, 'm2': 0.0}
+    demand_min = np.inf
+    demand_max = -np.inf
+    demand_counts = np.zeros(int(values.max()) + 1, dtype=np.int64)
+    
+    for first_hour, demand in demand_chunks(num_hours, chunk_size, seed, sampler):
+        update_moments(moments, demand)
+        demand_min = min(demand_min, demand.min())
+        demand_max = max(demand_max, demand.max())
+        demand_counts += np.bincount(demand.astype(np.int64), minlength=len(demand_counts))
+        
+        if csv_path is not None:
+            revenue, cost, utility = calculate_metrics(demand)
+            pd.DataFrame({
+                'Hora': np.arange(first_hour, first_hour + len(demand)),
+                'Demanda': demand,
+                'Ingreso': revenue,
+                'Costo_Total': cost,
+                'Utilidad': utility,
+            }).to_csv(csv_path, mode='w' if first_hour == 1 else 'a',
+                      header=first_hour == 1, index=False, encoding='utf-8')
+                      
+    margin = PRICE_PER_UNIT - COST_PER_UNIT
+    demand_std = np.sqrt(moments['m2'] / (moments['count'] - 1)) if num_hours > 1 else 0.0
+    total_demand = np.dot(np.arange(len(demand_counts)), demand_counts)
+    
+    return {
+        'utilidad_promedio': moments['mean'] * margin,
+        'utilidad_std': demand_std * margin,
+        'utilidad_min': demand_min * margin,
+        'utilidad_max': demand_max * margin,
+        'demanda_promedio': moments['mean'],
+        'demanda_std': demand_std,
+        'ingreso_total': total_demand * PRICE_PER_UNIT,
+        'costo_total': total_demand * COST_PER_UNIT,
+        'utilidad_total': total_demand * margin,
+        'demand_counts': demand_counts,
+    }
+
+
 def calculate_statistics(df):
     """
     Calculate descriptive statistics for the simulation.
@@ -153,6 +724,14 @@ def calculate_statistics(df):
         'utilidad_total': df['Utilidad'].sum(),
     }
     
+    # Exact reference distribution of total utility over the same horizon
+    exact = total_demand_distribution(len(df), quantile_levels=(0.05, 0.95))
+    observed_demand = int(df['Demanda'].sum())
+    stats['utilidad_total_exacta_media'] = exact['utility_mean']
+    stats['utilidad_total_exacta_std'] = np.sqrt(exact['utility_variance'])
+    stats['utilidad_total_exacta_p05'], stats['utilidad_total_exacta_p95'] = exact['utility_quantiles']
+    stats['percentil_utilidad_observada'] = exact['cdf'][min(observed_demand, len(exact['cdf']) - 1)]
+    
     return stats
 
 
@@ -311,6 +890,13 @@ def print_results(df, stats):
         theoretical = DEMAND_PROBABILITIES[int(demand)]
         print(f"   • {demand} hamburguesas: {count} veces ({freq:.1%}) - Teórica: {theoretical:.1%}")
     
+    print(f"\n6. DISTRIBUCIÓN EXACTA DE LA UTILIDAD TOTAL (convolución FFT):")
+    print(f"   • Media exacta: ${stats['utilidad_total_exacta_media']:.2f}")
+    print(f"   • Desviación estándar exacta: ${stats['utilidad_total_exacta_std']:.2f}")
+    print(f"   • Intervalo 90% (P5-P95): ${stats['utilidad_total_exacta_p05']:.2f} - ${stats['utilidad_total_exacta_p95']:.2f}")
+    print(f"   • Utilidad simulada: ${stats['utilidad_total']:.2f} "
+          f"(P(U ≤ simulada) = {stats['percentil_utilidad_observada']:.1%})")
+          
     print("\n" + "="*80)
     print("VALIDACIÓN DE CRITERIOS DE ACEPTACIÓN")
     print("="*80)
@@ -22,9 +22,13 @@ Output:
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from scipy import stats
+from scipy import special, stats
+from scipy.stats import qmc
 from pathlib import Path
 import warnings
+
+import normal_erlang_convolution
+
 warnings.filterwarnings('ignore')
 
 # ============================================================================
@@ -46,11 +50,53 @@ T2_LAMBDA = T2_K / T2_MEAN  # Rate parameter
 # Threshold
 THRESHOLD = 55
 
+# SLA curve (exceedance for a list of thresholds from the sorted sample)
+SLA_THRESHOLDS = np.arange(35, 95, 5)
+CONFIDENCE_LEVEL = 0.95
+
+# Bootstrap confidence intervals
+BOOTSTRAP_RESAMPLES = 10_000
+BOOTSTRAP_MAX_CELLS = 5_000_000  # resamples × pieces held in memory per chunk
+BOOTSTRAP_POISSON_MIN_N = 1_000_000  # switch to Poisson weights from this sample size
+
+# Quasi-Monte Carlo (scrambled Sobol) estimation
+QMC_LOG2_SAMPLES = 14  # 2^14 points per replicate
+QMC_REPLICATES = 16
+
+# N-stage pipeline (generalization of the two-stage process)
+PIPELINE_STAGES = [
+    {'name': 'Etapa 1', 'distribution': 'normal', 'params': {'mean': T1_MEAN, 'std': T1_STD}},
+    {'name': 'Etapa 2', 'distribution': 'erlang', 'params': {'k': T2_K, 'mean': T2_MEAN}},
+]
+PIPELINE_NUM_PIECES = 10_000_000
+PIPELINE_CHUNK_SIZE = 500_000
+PIPELINE_QUANTILES = (0.50, 0.90, 0.95, 0.99)
+PIPELINE_HISTOGRAM_BINS = 100
+
+# Tandem queue (pieces wait in front of busy stages)
+TANDEM_INTERARRIVAL = {'distribution': 'exponential', 'params': {'mean': 40}}
+TANDEM_NUM_PIECES = 2_000_000
+TANDEM_CHUNK_SIZE = 500_000
+
 # Output paths
 OUTPUT_DIR = Path("output/problema3")
 CSV_PATH = OUTPUT_DIR / "problema3_simulacion.csv"
 EXCEL_PATH = OUTPUT_DIR / "problema3_simulacion.xlsx"
 
+# Stage distributions: parameter names and a sampler(rng, size, **params)
+# that broadcasts parameter arrays over the columns of a (pieces, stages) block
+STAGE_DISTRIBUTIONS = {
+    'normal': (('mean', 'std'), lambda rng, size, mean, std: rng.normal(mean, std, size)),
+    'erlang': (('k', 'mean'), lambda rng, size, k, mean: rng.gamma(k, mean / k, size)),
+    'exponential': (('mean',), lambda rng, size, mean: rng.exponential(mean, size)),
+    'uniform': (('low', 'high'), lambda rng, size, low, high: rng.uniform(low, high, size)),
+    'triangular': (('left', 'mode', 'right'),
+                   lambda rng, size, left, mode, right: rng.triangular(left, mode, right, size)),
+    'lognormal': (('mean', 'std'), lambda rng, size, mean, std: rng.lognormal(
+        np.log(mean) - np.log1p((std / mean)**2) / 2, np.sqrt(np.log1p((std / mean)**2)), size)),
+    'deterministic': (('value',), lambda rng, size, value: np.broadcast_to(value, size).astype(float)),
+}
+
 # ============================================================================
 # SIMULATION FUNCTIONS
 # ============================================================================
@@ -94,6 +140,718 @@ def generate_t2(size=1):
     return np.random.gamma(T2_K, 1/T2_LAMBDA, size)
 
 
+def conditional_exceedance_probability(values, given='t2', threshold=THRESHOLD):
+    """
+    P(t1 + t2 > threshold | one stage time) for each sampled value.
+    
+    Both stages have closed-form survival functions, so the other stage is
+    integrated out analytically for the whole sample in one call:
+    given='t2' uses the Normal survival of t1 at threshold - t2, and
+    given='t1' the Erlang survival of t2 at threshold - t1.
+    
+    Parameters:
+    -----------
+    values : array-like
+        Sampled times of the conditioning stage (minutes)
+    given : str
+        Conditioning stage, 't2' or 't1'
+    threshold : float
+        Total-time threshold (minutes)
+        
+    Returns:
+    --------
+    np.ndarray
+        Conditional exceedance probabilities
+    """
+    remaining = threshold - np.asarray(values, dtype=float)
+    if given == 't2':
+        return stats.norm.sf(remaining, T1_MEAN, T1_STD)
+    if given == 't1':
+        return stats.gamma.sf(remaining, T2_K, scale=1/T2_LAMBDA)
+    raise ValueError(f"given must be 't2' or 't1', got {given!r}")
+
+
+def conditional_mc_estimate(values, indicator=None, given='t2', threshold=THRESHOLD):
+    """
+    Conditional Monte Carlo estimate of P(t1 + t2 > threshold).
+    
+    Averages conditional_exceedance_probability() over the sample of the
+    conditioning stage. When the indicator estimator built on the same
+    pieces is given (e.g. the Excede_Flag column), the variance-reduction
+    factor Var(indicator) / Var(conditional) is reported too; by the law of
+    total variance it is never below 1, and it is largest when the stage
+    integrated out carries most of the variance.
+    
+    Parameters:
+    -----------
+    values : array-like
+        Sampled times of the conditioning stage (minutes)
+    indicator : array-like, optional
+        0/1 exceedance flags for the same pieces
+    given : str
+        Conditioning stage, 't2' or 't1'
+    threshold : float
+        Total-time threshold (minutes)
+        
+    Returns:
+    --------
+    dict
+        estimate and std_error; with an indicator also indicator_estimate,
+        indicator_std_error, variance_reduction_factor and
+        indicator_equivalent_samples (pieces the indicator estimator needs
+        for the same precision)
+    """
+    probabilities = conditional_exceedance_probability(values, given, threshold)
+    num_samples = len(probabilities)
+    variance = probabilities.var(ddof=1)
+    result = {
+        'estimate': probabilities.mean(),
+        'std_error': np.sqrt(variance / num_samples),
+    }
+    if indicator is not None:
+        indicator = np.asarray(indicator, dtype=float)
+        indicator_variance = indicator.var(ddof=1)
+        reduction = indicator_variance / variance if variance > 0 else np.inf
+        result.update({
+            'indicator_estimate': indicator.mean(),
+            'indicator_std_error': np.sqrt(indicator_variance / num_samples),
+            'variance_reduction_factor': reduction,
+            'indicator_equivalent_samples': num_samples * reduction,
+        })
+    return result
+
+
+def qmc_sample(log2_samples, rng):
+    """
+    One scrambled-Sobol replicate of (t1, t2).
+    
+    Each 2-D point (u1, u2) is mapped through the inverse Normal CDF for t1
+    and the inverse Erlang (regularized gamma) CDF for t2.
+    
+    Parameters:
+    -----------
+    log2_samples : int
+        log2 of the number of points (Sobol balance needs a power of 2)
+    rng : np.random.Generator
+        Generator driving the random scramble
+        
+    Returns:
+    --------
+    tuple
+        (t1, t2) arrays of 2**log2_samples values
+    """
+    points = qmc.Sobol(d=2, scramble=True, seed=rng).random_base2(log2_samples)
+    t1 = T1_MEAN + T1_STD * special.ndtri(points[:, 0])
+    t2 = special.gammaincinv(T2_K, points[:, 1]) / T2_LAMBDA
+    return t1, t2
+
+
+def qmc_estimate(log2_samples=QMC_LOG2_SAMPLES, num_replicates=QMC_REPLICATES,
+                 seed=RANDOM_SEED):
+    """
+    Randomized QMC estimates of the mean total time and P(total > THRESHOLD).
+    
+    Independently scrambled replicates are i.i.d. unbiased estimates, so
+    their spread gives an honest standard error. The exceedance indicator
+    is discontinuous, which limits QMC to roughly O(n^-3/4); its smooth
+    conditional-MC counterpart (t2 integrated out given t1) recovers close
+    to O(n^-1) and is reported as well.
+    
+    Parameters:
+    -----------
+    log2_samples : int
+        log2 of the points per replicate
+    num_replicates : int
+        Independent scrambles
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    dict
+        total_mean, exceeds_pct and exceeds_pct_conditional, each with a
+        _se standard error across replicates, plus num_samples
+    """
+    replicate_rngs = [np.random.default_rng(child)
+                      for child in np.random.SeedSequence(seed).spawn(num_replicates)]
+    estimates = np.empty((num_replicates, 3))
+    for r, rng in enumerate(replicate_rngs):
+        t1, t2 = qmc_sample(log2_samples, rng)
+        estimates[r] = [
+            np.mean(t1 + t2),
+            np.mean(t1 + t2 > THRESHOLD),
+            np.mean(conditional_exceedance_probability(t1, given='t1')),
+        ]
+    means = estimates.mean(axis=0)
+    std_errors = estimates.std(axis=0, ddof=1) / np.sqrt(num_replicates)
+    
+    return {
+        'total_mean': means[0],
+        'total_mean_se': std_errors[0],
+        'exceeds_pct': means[1],
+        'exceeds_pct_se': std_errors[1],
+        'exceeds_pct_conditional': means[2],
+        'exceeds_pct_conditional_se': std_errors[2],
+        'num_samples': num_replicates * 2**log2_samples,
+    }
+
+
+def qmc_convergence(log2_range=range(8, 17), num_replicates=QMC_REPLICATES, seed=RANDOM_SEED):
+    """
+    Standard error of QMC versus plain MC as the sample size grows.
+    
+    The plain-MC reference is the analytic sqrt(Var / n) for the same
+    total number of points, with the exact variances of the total time
+    and of the exceedance indicator.
+    
+    Parameters:
+    -----------
+    log2_range : iterable of int
+        log2 of the points per replicate
+    num_replicates : int
+        Independent scrambles per size
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Points per replicate, QMC standard errors and the plain-MC
+        standard errors for the same budget
+    """
+    total_variance = T1_VARIANCE + T2_K / T2_LAMBDA**2
+    p_exact = float(normal_erlang_convolution.survival_function(THRESHOLD, T1_MEAN, T1_STD, T2_K, T2_MEAN))
+    rows = []
+    for log2_samples in log2_range:
+        result = qmc_estimate(log2_samples, num_replicates, seed)
+        n = result['num_samples']
+        rows.append({
+            'Puntos': 2**log2_samples,
+            'QMC_SE_Media': result['total_mean_se'],
+            'MC_SE_Media': np.sqrt(total_variance / n),
+            'QMC_SE_Excede': result['exceeds_pct_se'],
+            'QMC_SE_Excede_Condicional': result['exceeds_pct_conditional_se'],
+            'MC_SE_Excede': np.sqrt(p_exact * (1 - p_exact) / n),
+        })
+    return pd.DataFrame(rows)
+
+
+def pipeline_leaves(stages):
+    """
+    Flatten stage specs into leaf distributions.
+    
+    A stage is either a leaf {'name', 'distribution', 'params'} or a
+    parallel stage {'name', 'branches': [leaf, ...]} whose time is the
+    maximum of its branches.
+    
+    Parameters:
+    -----------
+    stages : list of dict
+        Stage specs
+        
+    Returns:
+    --------
+    tuple
+        (leaves, offsets): the leaf specs in stage order and the index of
+        each stage's first leaf
+    """
+    leaves = []
+    offsets = []
+    for stage in stages:
+        offsets.append(len(leaves))
+        branches = stage.get('branches', [stage])
+        if not branches:
+            raise ValueError(f"Stage {stage.get('name')!r} has no branches")
+        for leaf in branches:
+            if leaf.get('distribution') not in STAGE_DISTRIBUTIONS:
+                raise ValueError(f"Unknown distribution {leaf.get('distribution')!r} in stage "
+                                 f"{stage.get('name')!r}; expected one of {list(STAGE_DISTRIBUTIONS)}")
+            param_names = STAGE_DISTRIBUTIONS[leaf['distribution']][0]
+            if set(leaf['params']) != set(param_names):
+                raise ValueError(f"Stage {stage.get('name')!r} ({leaf['distribution']}) needs "
+                                 f"parameters {param_names}, got {tuple(leaf['params'])}")
+            leaves.append(leaf)
+    return leaves, np.array(offsets)
+
+
+def sample_pipeline(stages, size, rng):
+    """
+    Sample a (pieces, stages) matrix of stage times.
+    
+    Leaves that share a distribution are drawn in a single vectorized call
+    with broadcast parameter arrays; parallel stages take the maximum over
+    their branch columns.
+    
+    Parameters:
+    -----------
+    stages : list of dict
+        Stage specs (see pipeline_leaves())
+    size : int
+        Number of pieces
+    rng : np.random.Generator
+        Random generator
+        
+    Returns:
+    --------
+    np.ndarray
+        Stage times, shape (size, len(stages))
+    """
+    leaves, offsets = pipeline_leaves(stages)
+    leaf_times = np.empty((size, len(leaves)))
+    for distribution, (param_names, sampler) in STAGE_DISTRIBUTIONS.items():
+        columns = [j for j, leaf in enumerate(leaves) if leaf['distribution'] == distribution]
+        if not columns:
+            continue
+        params = {name: np.array([leaves[j]['params'][name] for j in columns], dtype=float)
+                  for name in param_names}
+        leaf_times[:, columns] = sampler(rng, (size, len(columns)), **params)
+    return np.maximum.reduceat(leaf_times, offsets, axis=1)
+
+
+def simulate_pipeline(stages=PIPELINE_STAGES, num_pieces=PIPELINE_NUM_PIECES, threshold=THRESHOLD,
+                      chunk_size=PIPELINE_CHUNK_SIZE, seed=RANDOM_SEED):
+    """
+    Simulate an N-stage process line and summarize the total time.
+    
+    Pieces are generated in chunks of the (pieces, stages) matrix; means
+    and the covariance of [stages..., total] are merged across chunks
+    (Chan et al.), so memory is bounded apart from the vector of totals
+    kept for quantiles. A stage's contribution to variance is
+    Cov(stage, total) / Var(total); the contributions add up to 1.
+    
+    Parameters:
+    -----------
+    stages : list of dict
+        Stage specs (see pipeline_leaves())
+    num_pieces : int
+        Number of pieces
+    threshold : float
+        Total-time threshold (minutes)
+    chunk_size : int
+        Pieces per vectorized chunk
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    dict
+        total_mean, total_std, quantiles (dict level -> minutes),
+        histogram (counts, edges), exceeds_pct, exceeds_pct_se,
+        num_pieces and stages (DataFrame with per-stage mean, variance
+        and contribution to the total variance)
+    """
+    rng = np.random.default_rng(seed)
+    num_columns = len(stages) + 1
+    count = 0
+    mean = np.zeros(num_columns)
+    comoment = np.zeros((num_columns, num_columns))
+    totals = np.empty(num_pieces)
+    
+    for offset in range(0, num_pieces, chunk_size):
+        size = min(chunk_size, num_pieces - offset)
+        stage_times = sample_pipeline(stages, size, rng)
+        block = np.column_stack([stage_times, stage_times.sum(axis=1)])
+        totals[offset:offset + size] = block[:, -1]
+        
+        block_mean = block.mean(axis=0)
+        centered = block - block_mean
+        delta = block_mean - mean
+        merged = count + size
+        comoment += centered.T @ centered + np.outer(delta, delta) * count * size / merged
+        mean += delta * size / merged
+        count = merged
+    
+    covariance = comoment / (count - 1)
+    total_variance = covariance[-1, -1]
+    exceeds_pct = np.count_nonzero(totals > threshold) / num_pieces
+    
+    stage_table = pd.DataFrame({
+        'Etapa': [stage.get('name', f'Etapa {i + 1}') for i, stage in enumerate(stages)],
+        'Distribucion': [stage.get('distribution') or
+                         'max(' + ', '.join(b['distribution'] for b in stage['branches']) + ')'
+                         for stage in stages],
+        'Media': mean[:-1],
+        'Varianza': np.diag(covariance)[:-1],
+        'Contribucion_Varianza': covariance[:-1, -1] / total_variance,
+    })
+    
+    return {
+        'total_mean': mean[-1],
+        'total_std': np.sqrt(total_variance),
+        'quantiles': dict(zip(PIPELINE_QUANTILES, np.quantile(totals, PIPELINE_QUANTILES))),
+        'histogram': np.histogram(totals, bins=PIPELINE_HISTOGRAM_BINS),
+        'exceeds_pct': exceeds_pct,
+        'exceeds_pct_se': np.sqrt(exceeds_pct * (1 - exceeds_pct) / num_pieces),
+        'num_pieces': num_pieces,
+        'stages': stage_table,
+    }
+
+
+def tandem_lindley(arrivals, service_times, last_departures):
+    """
+    Vectorized Lindley recursion through single-server FIFO stages in series.
+    
+    For each stage, D_i = max(R_i, D_{i-1}) + S_i (R = ready time, the
+    departure from the previous stage) is unrolled into
+    D_i = C_i + max(d0, max_{j<=i}(R_j - C_{j-1})) with C the cumulative
+    service, so each stage is a cumsum plus a running maximum.
+    
+    Parameters:
+    -----------
+    arrivals : np.ndarray
+        Arrival times at stage 1, shape (n,)
+    service_times : np.ndarray
+        Service times, shape (n, stages)
+    last_departures : np.ndarray
+        Departure time of the previous piece at each stage (carried over
+        from the previous chunk; zeros for an empty line)
+        
+    Returns:
+    --------
+    tuple
+        (starts, departures) arrays of shape (n, stages)
+    """
+    starts = np.empty_like(service_times)
+    departures = np.empty_like(service_times)
+    ready = arrivals
+    for j in range(service_times.shape[1]):
+        service = service_times[:, j]
+        cumulative = np.cumsum(service)
+        departures[:, j] = cumulative + np.maximum(
+            last_departures[j], np.maximum.accumulate(ready - (cumulative - service)))
+        starts[:, j] = departures[:, j] - service
+        ready = departures[:, j]
+    return starts, departures
+
+
+def simulate_tandem_queue(stages=PIPELINE_STAGES, interarrival=TANDEM_INTERARRIVAL,
+                          num_pieces=TANDEM_NUM_PIECES, threshold=THRESHOLD,
+                          chunk_size=TANDEM_CHUNK_SIZE, seed=RANDOM_SEED):
+    """
+    Simulate the process line as a tandem queue with an arrival stream.
+    
+    Pieces arrive at stage 1 with the given interarrival distribution and
+    wait in front of every busy stage (one server per stage, FIFO,
+    unlimited buffers). Service times are sampled with sample_pipeline()
+    (negative draws are clipped to 0) and pushed through tandem_lindley()
+    in chunks, carrying the clock and each stage's last departure. Time
+    averages cover the whole run from time 0, so use enough pieces to make
+    the empty-line start negligible.
+    
+    Parameters:
+    -----------
+    stages : list of dict
+        Stage specs (see pipeline_leaves())
+    interarrival : dict
+        Leaf spec {'distribution', 'params'} of the interarrival times
+    num_pieces : int
+        Number of pieces
+    threshold : float
+        Flow-time threshold (minutes)
+    chunk_size : int
+        Pieces per vectorized chunk
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    dict
+        stages (DataFrame with per-stage mean wait, utilization and WIP in
+        queue and at the stage), flow_mean, flow_std, flow_quantiles,
+        exceeds_pct (flow time > threshold), exceeds_pct_se,
+        processing_exceeds_pct (same pieces without waiting), wip_total,
+        throughput and num_pieces
+    """
+    rng = np.random.default_rng(seed)
+    interarrival_stage = [{'name': 'Llegadas', **interarrival}]
+    num_stages = len(stages)
+    clock = 0.0
+    last_departures = np.zeros(num_stages)
+    wait_sum = np.zeros(num_stages)
+    service_sum = np.zeros(num_stages)
+    processing_exceeds = 0
+    flow_times = np.empty(num_pieces)
+    
+    for offset in range(0, num_pieces, chunk_size):
+        size = min(chunk_size, num_pieces - offset)
+        arrivals = clock + np.cumsum(sample_pipeline(interarrival_stage, size, rng)[:, 0])
+        service_times = np.maximum(sample_pipeline(stages, size, rng), 0.0)
+        starts, departures = tandem_lindley(arrivals, service_times, last_departures)
+        
+        ready = np.column_stack([arrivals, departures[:, :-1]])
+        wait_sum += (starts - ready).sum(axis=0)
+        service_sum += service_times.sum(axis=0)
+        processing_exceeds += int(np.count_nonzero(service_times.sum(axis=1) > threshold))
+        flow_times[offset:offset + size] = departures[:, -1] - arrivals
+        
+        clock = arrivals[-1]
+        last_departures = departures[-1]
+    
+    # ∫N(t)dt equals the summed time pieces spend there (exact time averages)
+    horizon = last_departures[-1]
+    exceeds_pct = np.count_nonzero(flow_times > threshold) / num_pieces
+    stage_table = pd.DataFrame({
+        'Etapa': [stage.get('name', f'Etapa {i + 1}') for i, stage in enumerate(stages)],
+        'Espera_Media': wait_sum / num_pieces,
+        'Servicio_Medio': service_sum / num_pieces,
+        'Utilizacion': service_sum / horizon,
+        'WIP_Cola': wait_sum / horizon,
+        'WIP_Etapa': (wait_sum + service_sum) / horizon,
+    })
+    
+    return {
+        'stages': stage_table,
+        'flow_mean': flow_times.mean(),
+        'flow_std': flow_times.std(ddof=1),
+        'flow_quantiles': dict(zip(PIPELINE_QUANTILES, np.quantile(flow_times, PIPELINE_QUANTILES))),
+        'exceeds_pct': exceeds_pct,
+        'exceeds_pct_se': np.sqrt(exceeds_pct * (1 - exceeds_pct) / num_pieces),
+        'processing_exceeds_pct': processing_exceeds / num_pieces,
+        'wip_total': flow_times.sum() / horizon,
+        'throughput': num_pieces / horizon,
+        'num_pieces': num_pieces,
+    }
+
+
+def build_exceedance_index(total_times):
+    """
+    Sorted-sample index over simulated total times.
+    
+    Built once in O(n log n); exceedance_query() and quantile_query() then
+    answer each threshold or level in O(log n) or O(1).
+    
+    Parameters:
+    -----------
+    total_times : array-like
+        Simulated total times (minutes)
+        
+    Returns:
+    --------
+    dict
+        sorted (ascending sample) and n
+    """
+    sorted_times = np.sort(np.asarray(total_times, dtype=float))
+    return {'sorted': sorted_times, 'n': len(sorted_times)}
+
+
+def dkw_epsilon(n, confidence=CONFIDENCE_LEVEL):
+    """
+    Dvoretzky-Kiefer-Wolfowitz band half-width sqrt(ln(2/α) / (2n)).
+    
+    The band holds simultaneously for every threshold, so a whole SLA
+    curve can be read off it.
+    """
+    return np.sqrt(np.log(2 / (1 - confidence)) / (2 * n))
+
+
+def exceedance_query(index, thresholds, confidence=CONFIDENCE_LEVEL):
+    """
+    P(total > T) for each threshold, with a DKW confidence band.
+    
+    Parameters:
+    -----------
+    index : dict
+        Result of build_exceedance_index()
+    thresholds : array-like
+        Thresholds T (minutes)
+    confidence : float
+        Confidence level of the simultaneous band
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Threshold, empirical exceedance and lower/upper band
+    """
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    epsilon = dkw_epsilon(index['n'], confidence)
+    at_or_below = np.searchsorted(index['sorted'], thresholds, side='right')
+    exceedance = 1 - at_or_below / index['n']
+    return pd.DataFrame({
+        'Umbral': thresholds,
+        'P_Excede': exceedance,
+        'Banda_Inferior': np.clip(exceedance - epsilon, 0, 1),
+        'Banda_Superior': np.clip(exceedance + epsilon, 0, 1),
+    })
+
+
+def quantile_query(index, levels, confidence=CONFIDENCE_LEVEL):
+    """
+    Empirical quantiles (inverse ECDF) with DKW-derived bounds.
+    
+    The quantile at level q is bracketed by the empirical quantiles at
+    q - ε and q + ε; levels outside [0, 1] give ±inf.
+    
+    Parameters:
+    -----------
+    index : dict
+        Result of build_exceedance_index()
+    levels : array-like
+        Probability levels q in (0, 1)
+    confidence : float
+        Confidence level of the simultaneous band
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Level, quantile and lower/upper bounds (minutes)
+    """
+    levels = np.atleast_1d(np.asarray(levels, dtype=float))
+    epsilon = dkw_epsilon(index['n'], confidence)
+    
+    def inverse_ecdf(q):
+        positions = np.ceil(q * index['n']).astype(int) - 1
+        values = index['sorted'][np.clip(positions, 0, index['n'] - 1)]
+        return np.where(q <= 0, -np.inf, np.where(q > 1, np.inf, values))
+    
+    return pd.DataFrame({
+        'Nivel': levels,
+        'Cuantil': inverse_ecdf(levels),
+        'Cota_Inferior': inverse_ecdf(levels - epsilon),
+        'Cota_Superior': inverse_ecdf(levels + epsilon),
+    })
+
+
+def sla_curve(index, thresholds=SLA_THRESHOLDS, confidence=CONFIDENCE_LEVEL):
+    """
+    SLA curve: share of pieces finished within each threshold, with bands.
+    
+    Parameters:
+    -----------
+    index : dict
+        Result of build_exceedance_index()
+    thresholds : array-like
+        SLA values (minutes)
+    confidence : float
+        Confidence level of the simultaneous band
+        
+    Returns:
+    --------
+    pd.DataFrame
+        exceedance_query() columns plus the within-SLA share P_Cumple
+    """
+    curve = exceedance_query(index, thresholds, confidence)
+    curve['P_Cumple'] = 1 - curve['P_Excede']
+    return curve
+
+
+def bootstrap_moment_statistics(s0, s1, s2, exceed):
+    """
+    exceeds_pct, total_mean and total_std from (weighted) sums.
+    
+    Parameters:
+    -----------
+    s0, s1, s2, exceed : np.ndarray
+        Total weight, Σw·x, Σw·x² and Σw·1{x > threshold} per resample
+        (x centered beforehand to avoid cancellation)
+        
+    Returns:
+    --------
+    np.ndarray
+        Shape (3, resamples): exceeds_pct, centered mean, std
+    """
+    mean = s1 / s0
+    variance = np.maximum(s2 - s0 * mean**2, 0.0) / (s0 - 1)
+    return np.stack([exceed / s0, mean, np.sqrt(variance)])
+
+
+def bootstrap_statistics(total_times, threshold=THRESHOLD, num_resamples=BOOTSTRAP_RESAMPLES,
+                         method=None, confidence=CONFIDENCE_LEVEL,
+                         max_cells=BOOTSTRAP_MAX_CELLS, seed=RANDOM_SEED):
+    """
+    Percentile and BCa bootstrap intervals for exceeds_pct, total_mean and total_std.
+    
+    Each chunk of resamples is either a (resamples, n) index matrix
+    (method='indices') or a matrix of Poisson(1) weights
+    (method='poisson', the default from BOOTSTRAP_POISSON_MIN_N pieces);
+    all three statistics come from the same weighted sums in one
+    vectorized pass, and chunks hold at most max_cells entries. The BCa
+    acceleration uses the closed-form jackknife (leave-one-out sums).
+    
+    Parameters:
+    -----------
+    total_times : array-like
+        Simulated total times (minutes)
+    threshold : float
+        Threshold for exceeds_pct (minutes)
+    num_resamples : int
+        Bootstrap resamples B
+    method : str, optional
+        'indices' or 'poisson'; chosen from the sample size if None
+    confidence : float
+        Confidence level
+    max_cells : int
+        Maximum resamples × pieces per chunk
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    pd.DataFrame
+        One row per statistic: estimate, bootstrap standard error and the
+        percentile and BCa bounds
+    """
+    x = np.asarray(total_times, dtype=float)
+    n = len(x)
+    if method is None:
+        method = 'poisson' if n >= BOOTSTRAP_POISSON_MIN_N else 'indices'
+    if method not in ('indices', 'poisson'):
+        raise ValueError(f"method must be 'indices' or 'poisson', got {method!r}")
+    
+    rng = np.random.default_rng(seed)
+    shift = x.mean()
+    centered = x - shift
+    exceeds = (x > threshold).astype(float)
+    estimates = bootstrap_moment_statistics(
+        np.float64(n), centered.sum(), np.square(centered).sum(), exceeds.sum())
+    
+    replicates = np.empty((3, num_resamples))
+    chunk = max(1, max_cells // n)
+    for start in range(0, num_resamples, chunk):
+        size = min(chunk, num_resamples - start)
+        if method == 'indices':
+            indices = rng.integers(0, n, size=(size, n))
+            sample = centered[indices]
+            sums = (np.full(size, float(n)), sample.sum(axis=1), np.square(sample).sum(axis=1),
+                    exceeds[indices].sum(axis=1))
+        else:
+            weights = rng.poisson(1.0, size=(size, n)).astype(float)
+            sums = (weights.sum(axis=1), weights @ centered, weights @ np.square(centered),
+                    weights @ exceeds)
+        replicates[:, start:start + size] = bootstrap_moment_statistics(*sums)
+    
+    # Jackknife (leave-one-out) values for the BCa acceleration
+    jackknife = bootstrap_moment_statistics(
+        np.full(n, n - 1.0), centered.sum() - centered,
+        np.square(centered).sum() - np.square(centered), exceeds.sum() - exceeds)
+    deviations = jackknife.mean(axis=1, keepdims=True) - jackknife
+    denominator = 6 * np.square(deviations).sum(axis=1)**1.5
+    acceleration = np.divide((deviations**3).sum(axis=1), denominator,
+                             out=np.zeros(3), where=denominator > 0)
+    
+    alpha = 1 - confidence
+    z_levels = stats.norm.ppf([alpha / 2, 1 - alpha / 2])
+    rows = []
+    for i, name in enumerate(['exceeds_pct', 'total_mean', 'total_std']):
+        boot = replicates[i]
+        offset = shift if name == 'total_mean' else 0.0
+        # Bias correction; the proportion is kept off 0/1 so z0 stays finite
+        below = (np.count_nonzero(boot < estimates[i]) + 0.5 * np.count_nonzero(boot == estimates[i]))
+        z0 = stats.norm.ppf(np.clip(below / num_resamples, 1 / num_resamples, 1 - 1 / num_resamples))
+        adjusted = stats.norm.cdf(z0 + (z0 + z_levels) / (1 - acceleration[i] * (z0 + z_levels)))
+        percentile_bounds = np.quantile(boot, [alpha / 2, 1 - alpha / 2])
+        bca_bounds = np.quantile(boot, adjusted)
+        rows.append({
+            'Estadistico': name,
+            'Estimacion': estimates[i] + offset,
+            'Error_Estandar': boot.std(ddof=1),
+            'Percentil_Inf': percentile_bounds[0] + offset,
+            'Percentil_Sup': percentile_bounds[1] + offset,
+            'BCa_Inf': bca_bounds[0] + offset,
+            'BCa_Sup': bca_bounds[1] + offset,
+        })
+    return pd.DataFrame(rows)
+
+
 def run_simulation():
     """
     Run the complete two-stage process simulation for NUM_PIECES.
@@ -168,6 +926,24 @@ def calculate_statistics(df):
         'within_pct': (NUM_PIECES - exceeds_count) / NUM_PIECES,
     }
     
+    # Exact probability: Total ~ Normal(30, 10) + Erlang(3, 20)
+    stats_dict['exceeds_pct_exact'] = float(normal_erlang_convolution.survival_function(
+        THRESHOLD, T1_MEAN, T1_STD, T2_K, T2_MEAN))
+    
+    # Conditional MC on the same pieces, compared with the Excede_Flag indicator
+    stats_dict['exceeds_pct_indicator_se'] = np.sqrt(df['Excede_Flag'].var() / NUM_PIECES)
+    for given, column in [('t2', 't2_Etapa2_Erlang'), ('t1', 't1_Etapa1_Normal')]:
+        conditional = conditional_mc_estimate(df[column], df['Excede_Flag'], given)
+        stats_dict[f'exceeds_pct_conditional_{given}'] = conditional['estimate']
+        stats_dict[f'exceeds_pct_conditional_{given}_se'] = conditional['std_error']
+        stats_dict[f'conditional_{given}_vr_factor'] = conditional['variance_reduction_factor']
+    
+    # SLA curve from the sorted total times
+    stats_dict['sla_curve'] = sla_curve(build_exceedance_index(df['Tiempo_Total']))
+    
+    # Bootstrap confidence intervals for exceeds_pct, total_mean and total_std
+    stats_dict['bootstrap'] = bootstrap_statistics(df['Tiempo_Total'])
+    
     return stats_dict
 
 
@@ -273,9 +1049,11 @@ def save_to_excel(df, stats, fig):
         # Write main data
         df.to_excel(writer, sheet_name='Simulación', index=False)
         
-        # Write statistics
-        stats_df = pd.DataFrame([stats])
+        # Write statistics (tables go to their own sheets)
+        stats_df = pd.DataFrame([{k: v for k, v in stats.items() if not isinstance(v, pd.DataFrame)}])
         stats_df.to_excel(writer, sheet_name='Estadísticas', index=False)
+        stats['sla_curve'].to_excel(writer, sheet_name='Curva SLA', index=False)
+        stats['bootstrap'].to_excel(writer, sheet_name='Bootstrap', index=False)
     
     # Load workbook and add chart as image
     wb = load_workbook(EXCEL_PATH)
@@ -333,6 +1111,23 @@ def print_results(df, stats):
     print(f"   • Piezas dentro del umbral: {stats['within_count']} ({stats['within_pct']:.2%})")
     print(f"   • Piezas que exceden el umbral: {stats['exceeds_count']} ({stats['exceeds_pct']:.2%})")
     print(f"   • P(Tiempo > {THRESHOLD}) = {stats['exceeds_pct']:.4f}")
+    print(f"   • P(Tiempo > {THRESHOLD}) exacta = {stats['exceeds_pct_exact']:.4f}")
+    print(f"   • Error estándar del indicador (Excede_Flag): ± {stats['exceeds_pct_indicator_se']:.4f}")
+    for given in ('t2', 't1'):
+        print(f"   • MC condicional dado {given}: {stats[f'exceeds_pct_conditional_{given}']:.4f} "
+              f"± {stats[f'exceeds_pct_conditional_{given}_se']:.4f} "
+              f"(reducción de varianza: {stats[f'conditional_{given}_vr_factor']:.1f}x)")
+    
+    print(f"\n6. CURVA SLA (banda DKW {CONFIDENCE_LEVEL:.0%}):")
+    for _, row in stats['sla_curve'].iterrows():
+        print(f"   • P(Tiempo > {row['Umbral']:.0f}) = {row['P_Excede']:.4f} "
+              f"[{row['Banda_Inferior']:.4f}, {row['Banda_Superior']:.4f}]")
+    
+    print(f"\n7. INTERVALOS BOOTSTRAP ({BOOTSTRAP_RESAMPLES} remuestras, {CONFIDENCE_LEVEL:.0%}):")
+    for _, row in stats['bootstrap'].iterrows():
+        print(f"   • {row['Estadistico']}: {row['Estimacion']:.4f} "
+              f"(percentil: [{row['Percentil_Inf']:.4f}, {row['Percentil_Sup']:.4f}], "
+              f"BCa: [{row['BCa_Inf']:.4f}, {row['BCa_Sup']:.4f}])")
     
     print("\n" + "="*80)
     print("VALIDACIÓN DE CRITERIOS DE ACEPTACIÓN")
@@ -18,9 +18,12 @@ Output:
 - Excel file in output/problema5/ with data table and embedded charts
 """
 
+import heapq
+import math
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from scipy import stats
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
@@ -39,6 +42,18 @@ MEAN_INTERARRIVAL = 60 / LAMBDA_ARRIVALS  # minutes between arrivals
 MU_SERVICE = 15  # customers per hour
 MEAN_SERVICE = 60 / MU_SERVICE  # minutes per customer
 
+# Hourly arrival-rate profile (customers/hour) with morning and evening peaks
+HOURLY_ARRIVAL_RATES = np.array([2, 1, 1, 1, 2, 4, 9, 16, 18, 12, 9, 10,
+                                 12, 11, 9, 10, 14, 17, 15, 10, 7, 5, 4, 3])
+RATE_GRID_MINUTES = 1.0  # grid step to tabulate Λ(t) for continuous λ(t)
+
+# Customers per chunk in streaming mode (bounds peak memory)
+CHUNK_SIZE = 1_000_000
+
+# Steady-state output analysis
+NUM_BATCHES = 20  # non-overlapping batches for batch-means CIs
+CONFIDENCE_LEVEL = 0.95
+
 # Output paths
 OUTPUT_DIR = Path("output/problema5")
 CSV_PATH = OUTPUT_DIR / "problema5_simulacion.csv"
@@ -86,6 +101,258 @@ def generate_service_times(size):
     return np.random.exponential(MEAN_SERVICE, size)
 
 
+def lindley_kernel(interarrival_times, service_times, clock=None,
+                   server_available_time=0.0):
+    """
+    Compute the M/M/1 event times for all customers at once.
+    
+    The loop recursion D[i] = max(A[i], D[i-1]) + S[i] unrolls to
+    D[i] = C[i] + max(D[-1], max_{k<=i}(A[k] - C[k-1])), with C the
+    cumulative service time, so departures come from one cumsum and one
+    running maximum. Customers run along the last axis, so a 2-D input
+    (replications × customers) simulates every replication at once.
+    
+    Parameters:
+    -----------
+    interarrival_times : np.ndarray
+        Interarrival times in minutes
+    service_times : np.ndarray
+        Service times in minutes
+    clock : float or np.ndarray, optional
+        Arrival time of the previous customer (one per replication for
+        2-D input). If None, the first customer arrives at t=0 and its
+        interarrival time is ignored.
+    server_available_time : float or np.ndarray
+        Time at which the server becomes free for the first customer
+        
+    Returns:
+    --------
+    dict
+        Columnar arrays: interarrival, arrival, service_start, wait,
+        service, departure and system_time (all in minutes)
+    """
+    interarrival = np.array(interarrival_times, dtype=float)
+    service = np.asarray(service_times, dtype=float)
+    if clock is None:
+        interarrival[..., :1] = 0.0
+        clock = 0.0
+    server_available_time = np.asarray(server_available_time, dtype=float)[..., None]
+    
+    # Arrivals accumulate in the same order as the sequential clock
+    arrival = np.cumsum(interarrival, axis=-1)
+    arrival += np.asarray(clock, dtype=float)[..., None]
+    
+    # Departures via the unrolled Lindley recursion
+    cum_service = np.cumsum(service, axis=-1)
+    cum_service_before = np.empty_like(cum_service)
+    cum_service_before[..., :1] = 0.0
+    cum_service_before[..., 1:] = cum_service[..., :-1]
+    latest_start = np.maximum.accumulate(arrival - cum_service_before, axis=-1)
+    departure = cum_service + np.maximum(latest_start, server_available_time)
+    
+    # Service starts when the customer arrives or the server frees up
+    server_available = np.empty_like(departure)
+    server_available[..., :1] = server_available_time
+    server_available[..., 1:] = departure[..., :-1]
+    service_start = np.maximum(arrival, server_available)
+    service_end = service_start + service
+    
+    return {
+        'interarrival': interarrival,
+        'arrival': arrival,
+        'service_start': service_start,
+        'wait': service_start - arrival,
+        'service': service,
+        'departure': service_end,
+        'system_time': service_end - arrival,
+    }
+
+
+def simulate_queue_arrays(num_customers=NUM_CUSTOMERS, seed=RANDOM_SEED):
+    """
+    Simulate the M/M/1 queue with the array kernel, without building rows.
+    
+    Draws the same random sequence as simulate_queue() for the same seed.
+    
+    Parameters:
+    -----------
+    num_customers : int
+        Number of customers to simulate
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    dict
+        Columnar arrays from lindley_kernel()
+    """
+    interarrival_times = generate_interarrival_times(num_customers, seed=seed)
+    service_times = generate_service_times(num_customers)
+    return lindley_kernel(interarrival_times, service_times)
+
+
+def update_moments(acc, values):
+    """
+    Merge a chunk of values into running count, mean, M2, min and max.
+    
+    Uses the pairwise (Chan et al.) form of Welford's update, so each chunk
+    is reduced with vectorized NumPy calls and the merge is O(1).
+    
+    Parameters:
+    -----------
+    acc : dict
+        Accumulator with keys count, mean, m2, min and max
+    values : np.ndarray
+        New observations
+    """
+    count = len(values)
+    if count == 0:
+        return
+    chunk_mean = values.mean()
+    chunk_m2 = np.square(values - chunk_mean).sum()
+    total = acc['count'] + count
+    delta = chunk_mean - acc['mean']
+    acc['mean'] += delta * count / total
+    acc['m2'] += chunk_m2 + delta**2 * acc['count'] * count / total
+    acc['count'] = total
+    acc['min'] = min(acc['min'], values.min())
+    acc['max'] = max(acc['max'], values.max())
+
+
+def new_moments():
+    """Return an empty accumulator for update_moments()."""
+    return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf}
+
+
+def simulate_queue_streaming(num_customers=NUM_CUSTOMERS, chunk_size=CHUNK_SIZE,
+                             seed=RANDOM_SEED):
+    """
+    Simulate a very long M/M/1 run in fixed memory.
+    
+    Interarrival and service times are drawn chunk by chunk. The arrival
+    clock and server_available_time carry over between chunks, and each
+    chunk only feeds online accumulators, so peak memory depends on
+    chunk_size and not on num_customers.
+    
+    Parameters:
+    -----------
+    num_customers : int
+        Number of customers to simulate
+    chunk_size : int
+        Customers generated per chunk
+    seed : int
+        Seed for the run. Arrivals and services use separate streams so
+        the results do not depend on chunk_size.
+        
+    Returns:
+    --------
+    dict
+        Dictionary with Wq, Ws (mean, std, min, max), rho, Ls, Lq and
+        throughput over [0, last departure]
+    """
+    arrival_rng, service_rng = [np.random.default_rng(child)
+                                for child in np.random.SeedSequence(seed).spawn(2)]
+    
+    wait_acc = new_moments()
+    system_acc = new_moments()
+    total_service_time = 0.0
+    total_wait_time = 0.0
+    total_system_time = 0.0
+    clock = None
+    server_available_time = 0.0
+    
+    remaining = num_customers
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        interarrival_times = arrival_rng.exponential(MEAN_INTERARRIVAL, size)
+        service_times = service_rng.exponential(MEAN_SERVICE, size)
+        
+        events = lindley_kernel(interarrival_times, service_times, clock=clock,
+                                server_available_time=server_available_time)
+                                
+        # Carry state to the next chunk
+        clock = events['arrival'][-1]
+        server_available_time = events['departure'][-1]
+        
+        update_moments(wait_acc, events['wait'])
+        update_moments(system_acc, events['system_time'])
+        total_service_time += events['service'].sum()
+        total_wait_time += events['wait'].sum()
+        total_system_time += events['system_time'].sum()
+        
+        remaining -= size
+        
+    total_simulation_time = server_available_time
+    
+    return {
+        'total_customers': num_customers,
+        'total_simulation_time': total_simulation_time,
+        'total_simulation_hours': total_simulation_time / 60,
+        'throughput_per_hour': num_customers / total_simulation_time * 60,
+        'rho_observed': total_service_time / total_simulation_time,
+        'ls_observed': total_system_time / total_simulation_time,
+        'lq_observed': total_wait_time / total_simulation_time,
+        'wq_observed': wait_acc['mean'],
+        'wq_std': np.sqrt(wait_acc['m2'] / (wait_acc['count'] - 1)) if num_customers > 1 else 0.0,
+        'wq_max': wait_acc['max'],
+        'ws_observed': system_acc['mean'],
+        'ws_std': np.sqrt(system_acc['m2'] / (system_acc['count'] - 1)) if num_customers > 1 else 0.0,
+        'ws_min': system_acc['min'],
+        'ws_max': system_acc['max'],
+    }
+
+
+def simulate_replications(num_replications, num_customers=NUM_CUSTOMERS,
+                          percentiles=(5, 50, 95), seed=RANDOM_SEED):
+    """
+    Transient analysis over many independent replications at once.
+    
+    Every replication starts empty. Interarrival and service times are
+    drawn as replications × customers matrices in one call each, from two
+    streams spawned from one SeedSequence; the rows are disjoint blocks of
+    those streams, so replications are independent and the first R rows
+    do not change when more replications are requested. The Lindley
+    kernel then runs on the whole matrix, and all curves are reductions
+    along the replication axis.
+    
+    Parameters:
+    -----------
+    num_replications : int
+        Number of independent replications R
+    num_customers : int
+        Customers per replication N
+    percentiles : sequence of float
+        Percentiles of the waiting time to report per customer index
+    seed : int
+        Root seed for the arrival and service streams
+        
+    Returns:
+    --------
+    dict
+        Per-customer curves of length N: mean_wait, p_wait (probability
+        that customer n waits), mean_system_time and wait_percentiles
+        (len(percentiles) × N), plus replication_mean_wait (length R)
+    """
+    arrival_rng, service_rng = [np.random.default_rng(child)
+                                for child in np.random.SeedSequence(seed).spawn(2)]
+    shape = (num_replications, num_customers)
+    interarrival = arrival_rng.exponential(MEAN_INTERARRIVAL, shape)
+    service = service_rng.exponential(MEAN_SERVICE, shape)
+    
+    events = lindley_kernel(interarrival, service)
+    wait = events['wait']
+    
+    return {
+        'customer': np.arange(1, num_customers + 1),
+        'mean_wait': wait.mean(axis=0),
+        'p_wait': (wait > 0).mean(axis=0),
+        'mean_system_time': events['system_time'].mean(axis=0),
+        'wait_percentiles': np.percentile(wait, percentiles, axis=0),
+        'percentiles': np.asarray(percentiles),
+        'replication_mean_wait': wait.mean(axis=1),
+    }
+
+
 def simulate_queue():
     """
     Simulate M/M/1 queue for NUM_CUSTOMERS.
@@ -99,61 +366,760 @@ def simulate_queue():
     print("EJERCICIO 5: SIMULACIÓN DE COLA M/M/1 EN GASOLINERA")
     print("="*80)
     
-    # Set seed
-    np.random.seed(RANDOM_SEED)
+    # Compute all customer events with the vectorized kernel
+    events = simulate_queue_arrays(NUM_CUSTOMERS, seed=RANDOM_SEED)
     
-    # Generate all interarrival and service times
-    interarrival_times = generate_interarrival_times(NUM_CUSTOMERS, seed=RANDOM_SEED)
-    service_times = generate_service_times(NUM_CUSTOMERS)
+    df = pd.DataFrame({
+        'Cliente': np.arange(1, NUM_CUSTOMERS + 1),
+        'Tiempo_Entre_Llegadas': events['interarrival'],
+        'Tiempo_Llegada': events['arrival'],
+        'Tiempo_Inicio_Servicio': events['service_start'],
+        'Tiempo_En_Cola': events['wait'],
+        'Tiempo_Servicio': events['service'],
+        'Tiempo_Fin_Servicio': events['departure'],
+        'Tiempo_En_Sistema': events['system_time'],
+    })
     
-    # Initialize simulation variables
-    results = []
-    clock = 0.0  # simulation clock
-    server_available_time = 0.0  # when server becomes free
+    return df
+
+
+def queue_length_sweep(arrival, service_start, departure):
+    """
+    Sweep merged arrival and departure events to get exact N(t) and Nq(t).
+    
+    Each arrival adds one customer to the system and to the queue, each
+    service start removes one from the queue and each departure removes one
+    from the system. Sorting the merged events is O(n log n); the counts are
+    cumulative sums of the +1/-1 steps. Simultaneous events are collapsed so
+    every step has positive duration.
     
-    for i in range(NUM_CUSTOMERS):
-        customer_num = i + 1
+    Parameters:
+    -----------
+    arrival : np.ndarray
+        Arrival times in minutes
+    service_start : np.ndarray
+        Service start times in minutes
+    departure : np.ndarray
+        Departure times in minutes
         
-        # Customer arrival time
-        if i == 0:
-            arrival_time = 0.0
-        else:
-            arrival_time = clock + interarrival_times[i]
+    Returns:
+    --------
+    dict
+        times (step start times), n_system and n_queue (values on
+        [times[j], times[j+1])), durations, ls and lq (time averages over
+        [0, last departure]) and p_n (time fraction with N = k, index k)
+    """
+    arrival = np.asarray(arrival, dtype=float)
+    n = len(arrival)
+    if n == 0:
+        # No customers: the system stays empty
+        return {
+            'times': np.empty(0),
+            'n_system': np.empty(0, dtype=np.int64),
+            'n_queue': np.empty(0, dtype=np.int64),
+            'durations': np.empty(0),
+            'ls': 0.0,
+            'lq': 0.0,
+            'p_n': np.array([1.0]),
+        }
+    
+    # Merged events: -1 steps are listed first so ties resolve them first
+    event_times = np.concatenate((departure, service_start, arrival))
+    system_step = np.concatenate((
+        np.full(n, -1, dtype=np.int8), np.zeros(n, dtype=np.int8), np.ones(n, dtype=np.int8)))
+    queue_step = np.concatenate((
+        np.zeros(n, dtype=np.int8), np.full(n, -1, dtype=np.int8), np.ones(n, dtype=np.int8)))
         
-        clock = arrival_time
+    order = np.argsort(event_times, kind='stable')
+    event_times = event_times[order]
+    n_system = np.cumsum(system_step[order], dtype=np.int64)
+    n_queue = np.cumsum(queue_step[order], dtype=np.int64)
+    
+    # Keep the state after the last event at each distinct time
+    last_at_time = np.empty(len(event_times), dtype=bool)
+    last_at_time[:-1] = event_times[1:] != event_times[:-1]
+    last_at_time[-1] = True
+    times = event_times[last_at_time]
+    n_system = n_system[last_at_time]
+    n_queue = n_queue[last_at_time]
+    
+    durations = np.diff(times, append=times[-1])
+    horizon = times[-1]
+    
+    # The system is empty on [0, first event), so that idle prefix counts toward N = 0
+    p_n = np.bincount(n_system, weights=durations)
+    p_n[0] += times[0]
+    p_n /= horizon
+    
+    return {
+        'times': times,
+        'n_system': n_system,
+        'n_queue': n_queue,
+        'durations': durations,
+        'ls': np.dot(n_system, durations) / horizon,
+        'lq': np.dot(n_queue, durations) / horizon,
+        'p_n': p_n,
+    }
+
+
+def exponential_service(mean):
+    """
+    Exponential service-time distribution (M).
+    
+    Parameters:
+    -----------
+    mean : float
+        Mean service time in minutes
         
-        # Service start time (either immediately or when server is free)
-        service_start = max(arrival_time, server_available_time)
+    Returns:
+    --------
+    dict
+        Service distribution with sample(rng, size), mean and scv
+        (squared coefficient of variation)
+    """
+    return {
+        'name': f'Exponencial(media={mean})',
+        'sample': lambda rng, size: rng.exponential(mean, size),
+        'mean': mean,
+        'scv': 1.0,
+    }
+
+
+def erlang_service(k, mean):
+    """
+    Erlang-k service-time distribution (E_k).
+    
+    Parameters:
+    -----------
+    k : int
+        Shape parameter
+    mean : float
+        Mean service time in minutes
         
-        # Time in queue
-        time_in_queue = service_start - arrival_time
+    Returns:
+    --------
+    dict
+        Service distribution with sample(rng, size), mean and scv
+    """
+    return {
+        'name': f'Erlang(k={k}, media={mean})',
+        'sample': lambda rng, size: rng.gamma(k, mean / k, size),
+        'mean': mean,
+        'scv': 1.0 / k,
+    }
+
+
+def deterministic_service(mean):
+    """
+    Constant service time (D).
+    
+    Parameters:
+    -----------
+    mean : float
+        Service time in minutes
         
-        # Service time
-        service_time = service_times[i]
+    Returns:
+    --------
+    dict
+        Service distribution with sample(rng, size), mean and scv
+    """
+    return {
+        'name': f'Determinística({mean})',
+        'sample': lambda rng, size: np.full(size, float(mean)),
+        'mean': mean,
+        'scv': 0.0,
+    }
+
+
+def lognormal_service(mean, scv):
+    """
+    Lognormal service-time distribution with a given mean and scv.
+    
+    Parameters:
+    -----------
+    mean : float
+        Mean service time in minutes
+    scv : float
+        Squared coefficient of variation (variance / mean²)
         
-        # Service end time
-        service_end = service_start + service_time
+    Returns:
+    --------
+    dict
+        Service distribution with sample(rng, size), mean and scv
+    """
+    sigma = np.sqrt(np.log1p(scv))
+    mu = np.log(mean) - sigma**2 / 2
+    return {
+        'name': f'Lognormal(media={mean}, cv²={scv})',
+        'sample': lambda rng, size: rng.lognormal(mu, sigma, size),
+        'mean': mean,
+        'scv': scv,
+    }
+
+
+def simulate_station(num_customers, num_servers=1, service=None,
+                     lambda_arrivals=LAMBDA_ARRIVALS, seed=RANDOM_SEED):
+    """
+    Simulate a FCFS queue with c servers using a heap-based event calendar.
+    
+    The calendar holds one completion event (free_time, server) per pump
+    in a binary heap. Each arrival pops the earliest completion, starts
+    service at max(arrival, free_time) and pushes its own completion, so a
+    run costs O(n log c). Per-customer results are kept in preallocated
+    float64 arrays plus an int16 server index.
+    
+    Parameters:
+    -----------
+    num_customers : int
+        Number of customers to simulate
+    num_servers : int
+        Number of servers (pumps)
+    service : dict, optional
+        Service distribution (see exponential_service()); defaults to
+        exponential with MEAN_SERVICE
+    lambda_arrivals : float
+        Poisson arrival rate in customers per hour
+    seed : int
+        Random seed
         
-        # Total time in system
-        time_in_system = service_end - arrival_time
+    Returns:
+    --------
+    dict
+        Columnar arrays (arrival, service_start, wait, service, departure,
+        system_time, server) and per-server utilization
+    """
+    if service is None:
+        service = exponential_service(MEAN_SERVICE)
         
-        # Update server availability
-        server_available_time = service_end
+    rng = np.random.default_rng(seed)
+    interarrival = rng.exponential(60 / lambda_arrivals, num_customers)
+    interarrival[0] = 0.0
+    arrival = np.cumsum(interarrival)
+    service_times = np.asarray(service['sample'](rng, num_customers), dtype=float)
+    
+    service_start = np.empty(num_customers)
+    server = np.empty(num_customers, dtype=np.int16)
+    
+    # Event calendar: next completion time of every server
+    calendar = [(0.0, k) for k in range(num_servers)]
+    heapq.heapify(calendar)
+    
+    arrival_list = arrival.tolist()
+    service_list = service_times.tolist()
+    for i in range(num_customers):
+        free_time, k = calendar[0]
+        start = arrival_list[i] if arrival_list[i] > free_time else free_time
+        heapq.heapreplace(calendar, (start + service_list[i], k))
+        service_start[i] = start
+        server[i] = k
         
-        results.append({
-            'Cliente': customer_num,
-            'Tiempo_Entre_Llegadas': interarrival_times[i] if i > 0 else 0,
-            'Tiempo_Llegada': arrival_time,
-            'Tiempo_Inicio_Servicio': service_start,
-            'Tiempo_En_Cola': time_in_queue,
-            'Tiempo_Servicio': service_time,
-            'Tiempo_Fin_Servicio': service_end,
-            'Tiempo_En_Sistema': time_in_system,
-        })
+    departure = service_start + service_times
+    horizon = departure.max()
+    busy_time = np.bincount(server, weights=service_times, minlength=num_servers)
     
-    df = pd.DataFrame(results)
+    return {
+        'arrival': arrival,
+        'service_start': service_start,
+        'wait': service_start - arrival,
+        'service': service_times,
+        'departure': departure,
+        'system_time': departure - arrival,
+        'server': server,
+        'server_utilization': busy_time / horizon,
+    }
+
+
+def erlang_c(num_servers, offered_load):
+    """
+    Erlang-C probability that an arriving customer has to wait in M/M/c.
     
-    return df
+    Parameters:
+    -----------
+    num_servers : int
+        Number of servers c
+    offered_load : float
+        Offered load a = λ/μ (must be < c)
+        
+    Returns:
+    --------
+    float
+        P(wait > 0)
+    """
+    # Erlang-B by its stable recursion, then convert to Erlang-C
+    erlang_b = 1.0
+    for k in range(1, num_servers + 1):
+        erlang_b = offered_load * erlang_b / (k + offered_load * erlang_b)
+    rho = offered_load / num_servers
+    return erlang_b / (1 - rho + rho * erlang_b)
+
+
+def queue_theoretical_metrics(lambda_arrivals, mu_service, num_servers=1, service_scv=1.0):
+    """
+    Analytic steady-state metrics for M/M/c and M/G/1 queues.
+    
+    M/M/c uses Erlang-C and M/G/1 uses the Pollaczek-Khinchine formula
+    Lq = ρ²(1 + cs²) / (2(1 - ρ)); both reduce to M/M/1 for c=1, cs²=1.
+    For M/G/c (c > 1, cs² != 1) there is no closed form, and the
+    Allen-Cunneen approximation Lq ≈ Lq(M/M/c)(1 + cs²)/2 is returned.
+    
+    Parameters:
+    -----------
+    lambda_arrivals : float
+        Arrival rate in customers per hour
+    mu_service : float
+        Service rate per server in customers per hour
+    num_servers : int
+        Number of servers c
+    service_scv : float
+        Squared coefficient of variation of the service time
+        
+    Returns:
+    --------
+    dict
+        rho, p_wait, ls, lq, ws and wq (times in minutes) and whether the
+        result is exact
+    """
+    offered_load = lambda_arrivals / mu_service
+    rho = offered_load / num_servers
+    if rho >= 1:
+        return {'rho': rho, 'p_wait': 1.0, 'ls': math.inf, 'lq': math.inf,
+                'ws': math.inf, 'wq': math.inf, 'exact': True}
+                
+    if num_servers == 1:
+        p_wait = rho
+        lq = rho**2 * (1 + service_scv) / (2 * (1 - rho))
+        exact = True
+    else:
+        p_wait = erlang_c(num_servers, offered_load)
+        lq = p_wait * rho / (1 - rho) * (1 + service_scv) / 2
+        exact = service_scv == 1.0
+        
+    wq = lq / lambda_arrivals * 60  # in minutes
+    ws = wq + 60 / mu_service
+    ls = lq + offered_load
+    
+    return {
+        'rho': rho,
+        'p_wait': p_wait,
+        'ls': ls,
+        'lq': lq,
+        'ws': ws,
+        'wq': wq,
+        'exact': exact,
+    }
+
+
+def window_time_averages(sweep, level, boundaries):
+    """
+    Exact time average of a piecewise-constant level over each window.
+    
+    Parameters:
+    -----------
+    sweep : dict
+        Output of queue_length_sweep()
+    level : np.ndarray
+        Value on each step of the sweep (e.g. sweep['n_system'])
+    boundaries : np.ndarray
+        Increasing window edges in minutes (the system is empty before the
+        first and after the last event)
+        
+    Returns:
+    --------
+    np.ndarray
+        Time average of the level on each [boundaries[j], boundaries[j+1])
+    """
+    if len(sweep['times']) == 0:
+        return np.zeros(len(boundaries) - 1)
+    step = np.searchsorted(sweep['times'], boundaries, side='right') - 1
+    before_start = step < 0
+    step[before_start] = 0
+    area = np.concatenate(([0.0], np.cumsum(level * sweep['durations'])))
+    area_at = area[step] + level[step] * (boundaries - sweep['times'][step])
+    area_at[before_start] = 0.0
+    return np.diff(area_at) / np.diff(boundaries)
+
+
+def mser5_truncation(values):
+    """
+    Find the warm-up length with the MSER-5 rule.
+    
+    The series is averaged in batches of 5 and the truncation point d
+    minimizes MSER(d) = SSE(Z[d:]) / (m - d)², searched over the first
+    half of the m batches. All candidates are evaluated at once with
+    reversed cumulative sums.
+    
+    Parameters:
+    -----------
+    values : np.ndarray
+        Output series in observation order (e.g. waiting times)
+        
+    Returns:
+    --------
+    int
+        Number of initial observations to discard
+    """
+    num_groups = len(values) // 5
+    if num_groups < 2:
+        return 0
+    z = values[:num_groups * 5].reshape(num_groups, 5).mean(axis=1)
+    z = z - z.mean()
+    
+    tail_sum = np.cumsum(z[::-1])[::-1]
+    tail_sq_sum = np.cumsum(np.square(z)[::-1])[::-1]
+    tail_count = np.arange(num_groups, 0, -1)
+    mser = (tail_sq_sum - tail_sum**2 / tail_count) / tail_count**2
+    
+    d = int(np.argmin(mser[:num_groups // 2 + 1]))
+    return 5 * d
+
+
+def batch_means_ci(batch_values, confidence=CONFIDENCE_LEVEL):
+    """
+    Student-t confidence interval from non-overlapping batch means.
+    
+    Parameters:
+    -----------
+    batch_values : np.ndarray
+        One mean per batch
+    confidence : float
+        Confidence level
+        
+    Returns:
+    --------
+    dict
+        mean, half_width, ci_low and ci_high
+    """
+    num_batches = len(batch_values)
+    mean = batch_values.mean()
+    t_value = stats.t.ppf((1 + confidence) / 2, num_batches - 1)
+    half_width = t_value * batch_values.std(ddof=1) / np.sqrt(num_batches)
+    return {
+        'mean': mean,
+        'half_width': half_width,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width,
+    }
+
+
+def steady_state_analysis(events, num_batches=NUM_BATCHES, confidence=CONFIDENCE_LEVEL,
+                          num_servers=1):
+    """
+    Steady-state point estimates and batch-means CIs for Wq, Ws, Lq, Ls, ρ.
+    
+    The warm-up is found with MSER-5 on the waiting times. Wq and Ws use
+    batches of consecutive customers after the warm-up; Lq, Ls and ρ use
+    equal-length time batches over [warm-up end, last arrival], integrated
+    exactly from the N(t) trajectory of queue_length_sweep().
+    
+    Parameters:
+    -----------
+    events : dict
+        Columnar arrays from lindley_kernel() or simulate_station()
+    num_batches : int
+        Number of non-overlapping batches
+    confidence : float
+        Confidence level
+    num_servers : int
+        Number of servers, used for ρ = E[min(N, c)] / c
+        
+    Returns:
+    --------
+    dict
+        warmup_customers, warmup_time and one CI dict per metric
+        (wq, ws, lq, ls, rho)
+    """
+    warmup = mser5_truncation(events['wait'])
+    batch_size = (len(events['wait']) - warmup) // num_batches
+    
+    results = {
+        'warmup_customers': warmup,
+        'warmup_time': events['arrival'][warmup],
+    }
+    
+    # Customer-indexed metrics
+    for key, column in (('wq', 'wait'), ('ws', 'system_time')):
+        values = events[column][warmup:warmup + batch_size * num_batches]
+        batch_values = values.reshape(num_batches, batch_size).mean(axis=1)
+        results[key] = batch_means_ci(batch_values, confidence)
+        
+    # Time-averaged metrics from the exact N(t) trajectory
+    sweep = queue_length_sweep(events['arrival'], events['service_start'], events['departure'])
+    boundaries = np.linspace(results['warmup_time'], events['arrival'].max(), num_batches + 1)
+    
+    for key, level in (('ls', sweep['n_system']),
+                       ('lq', sweep['n_queue']),
+                       ('rho', np.minimum(sweep['n_system'], num_servers) / num_servers)):
+        batch_values = window_time_averages(sweep, level, boundaries)
+        results[key] = batch_means_ci(batch_values, confidence)
+        
+    return results
+
+
+def simulate_until_precision(relative_half_width=0.05, initial_customers=10_000,
+                             max_customers=100_000_000, num_batches=NUM_BATCHES,
+                             confidence=CONFIDENCE_LEVEL, seed=RANDOM_SEED):
+    """
+    Extend an M/M/1 run until every steady-state CI is precise enough.
+    
+    The run starts with initial_customers and doubles in length, carrying
+    the clock and server availability into each extension, until the
+    half-width of every CI (Wq, Ws, Lq, Ls, ρ) is below
+    relative_half_width times its point estimate, or max_customers is
+    reached.
+    
+    Parameters:
+    -----------
+    relative_half_width : float
+        Target half-width relative to the point estimate
+    initial_customers : int
+        Length of the first run
+    max_customers : int
+        Upper bound on the number of customers
+    num_batches : int
+        Number of non-overlapping batches
+    confidence : float
+        Confidence level
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    dict
+        steady_state_analysis() results plus num_customers and whether the
+        target was reached
+    """
+    arrival_rng, service_rng = [np.random.default_rng(child)
+                                for child in np.random.SeedSequence(seed).spawn(2)]
+                                
+    chunks = []
+    clock = None
+    server_available_time = 0.0
+    num_customers = 0
+    size = initial_customers
+    
+    while True:
+        events = lindley_kernel(arrival_rng.exponential(MEAN_INTERARRIVAL, size),
+                                service_rng.exponential(MEAN_SERVICE, size),
+                                clock=clock, server_available_time=server_available_time)
+        clock = events['arrival'][-1]
+        server_available_time = events['departure'][-1]
+        chunks.append(events)
+        num_customers += size
+        
+        all_events = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in events}
+        chunks = [all_events]
+        analysis = steady_state_analysis(all_events, num_batches, confidence)
+        
+        converged = all(analysis[key]['half_width'] <= relative_half_width * abs(analysis[key]['mean'])
+                        for key in ('wq', 'ws', 'lq', 'ls', 'rho'))
+        if converged or num_customers >= max_customers:
+            break
+        size = min(num_customers, max_customers - num_customers)
+        
+    analysis['num_customers'] = num_customers
+    analysis['converged'] = converged
+    return analysis
+
+
+def piecewise_rate(hourly_rates=HOURLY_ARRIVAL_RATES):
+    """
+    Build a daily-periodic, piecewise-constant rate function λ(t).
+    
+    Parameters:
+    -----------
+    hourly_rates : np.ndarray
+        Arrival rate (customers/hour) for each hour of the day
+        
+    Returns:
+    --------
+    callable
+        Vectorized λ(t) in customers/hour for t in minutes
+    """
+    hourly_rates = np.asarray(hourly_rates, dtype=float)
+    
+    def rate(t):
+        hour = np.floor_divide(t, 60).astype(np.int64) % len(hourly_rates)
+        return hourly_rates[hour]
+        
+    return rate
+
+
+def nhpp_arrivals_thinning(rate_function, rate_max, horizon, rng):
+    """
+    Non-homogeneous Poisson arrivals by thinning (Lewis-Shedler).
+    
+    A homogeneous process with rate rate_max is drawn at once as sorted
+    uniforms on [0, horizon], and each point is kept with probability
+    λ(t) / rate_max. rate_max must bound λ(t); a candidate where it does
+    not raises ValueError instead of silently under-sampling the peak.
+    
+    Parameters:
+    -----------
+    rate_function : callable
+        Vectorized λ(t) in customers/hour, t in minutes
+    rate_max : float
+        Upper bound of λ(t) over the horizon (customers/hour)
+    horizon : float
+        Length of the run in minutes
+    rng : np.random.Generator
+        Random number generator
+        
+    Returns:
+    --------
+    np.ndarray
+        Sorted arrival times in minutes
+    """
+    num_candidates = rng.poisson(rate_max * horizon / 60)
+    candidates = np.sort(rng.uniform(0, horizon, num_candidates))
+    rates = rate_function(candidates)
+    if num_candidates and rates.max() > rate_max:
+        raise ValueError(f"λ(t) = {rates.max():.4f} exceeds rate_max = {rate_max:.4f} "
+                         f"at t = {candidates[rates.argmax()]:.2f} min; pass a valid upper bound")
+    keep = rng.uniform(0, rate_max, num_candidates) < rates
+    return candidates[keep]
+
+
+def nhpp_arrivals_inversion(rate_function, horizon, rng, hourly_rates=None):
+    """
+    Non-homogeneous Poisson arrivals by inverting the cumulative rate Λ(t).
+    
+    Unit-rate Poisson epochs on [0, Λ(horizon)] are mapped through Λ⁻¹.
+    For a piecewise-constant hourly profile Λ is piecewise linear and the
+    inversion is exact; otherwise Λ is tabulated with the trapezoid rule
+    on a RATE_GRID_MINUTES grid.
+    
+    Parameters:
+    -----------
+    rate_function : callable
+        Vectorized λ(t) in customers/hour, t in minutes
+    horizon : float
+        Length of the run in minutes
+    rng : np.random.Generator
+        Random number generator
+    hourly_rates : np.ndarray, optional
+        Hourly profile behind rate_function, if piecewise constant
+        
+    Returns:
+    --------
+    np.ndarray
+        Sorted arrival times in minutes
+    """
+    if hourly_rates is not None:
+        grid = np.append(np.arange(0, horizon, 60.0), horizon)
+        cumulative = np.concatenate(([0.0], np.cumsum(rate_function(grid[:-1]) * np.diff(grid) / 60)))
+    else:
+        grid = np.append(np.arange(0, horizon, RATE_GRID_MINUTES), horizon)
+        rates = rate_function(grid)
+        cumulative = np.concatenate(([0.0], np.cumsum((rates[1:] + rates[:-1]) / 2 * np.diff(grid) / 60)))
+        
+    num_arrivals = rng.poisson(cumulative[-1])
+    unit_epochs = np.sort(rng.uniform(0, cumulative[-1], num_arrivals))
+    return np.interp(unit_epochs, cumulative, grid)
+
+
+def simulate_nonhomogeneous_queue(horizon_hours=24, hourly_rates=HOURLY_ARRIVAL_RATES,
+                                  rate_function=None, method='inversion', rate_max=None,
+                                  window_minutes=60, seed=RANDOM_SEED):
+    """
+    Simulate the single-pump station under a time-varying arrival rate.
+    
+    Arrivals come from nhpp_arrivals_inversion() or
+    nhpp_arrivals_thinning(), the queue runs through lindley_kernel(), and
+    metrics are grouped by time window of the day, pooling all days of
+    the horizon.
+    
+    Parameters:
+    -----------
+    horizon_hours : float
+        Length of the run in hours (e.g. 24 or 8760)
+    hourly_rates : np.ndarray
+        Hourly rate profile, used when rate_function is None
+    rate_function : callable, optional
+        Continuous λ(t) in customers/hour, t in minutes
+    method : str
+        'inversion' or 'thinning'
+    rate_max : float, optional
+        Upper bound of λ(t) for thinning (customers/hour). Defaults to the
+        profile maximum, or for a continuous rate_function to the maximum
+        on a RATE_GRID_MINUTES grid plus 5%; thinning raises ValueError if
+        λ(t) exceeds it, so pass the true bound when it is known
+    window_minutes : float
+        Width of the reporting windows (must divide a day)
+    seed : int
+        Random seed
+        
+    Returns:
+    --------
+    tuple
+        (per-window pd.DataFrame, columnar event arrays)
+    """
+    if (24 * 60) % window_minutes != 0:
+        raise ValueError(f"window_minutes must divide a day (1440 min), got {window_minutes}")
+    rng = np.random.default_rng(seed)
+    horizon = horizon_hours * 60
+    profile = None
+    if rate_function is None:
+        profile = np.asarray(hourly_rates, dtype=float)
+        rate_function = piecewise_rate(profile)
+        
+    if method == 'thinning':
+        if rate_max is None and profile is not None:
+            rate_max = profile.max()
+        elif rate_max is None:
+            # Grid maximum with a 5% margin for peaks between grid points
+            rate_max = rate_function(np.arange(0, horizon, RATE_GRID_MINUTES)).max() * 1.05
+        arrival_times = nhpp_arrivals_thinning(rate_function, rate_max, horizon, rng)
+    elif method == 'inversion':
+        arrival_times = nhpp_arrivals_inversion(rate_function, horizon, rng, hourly_rates=profile)
+    else:
+        raise ValueError(f"method must be 'inversion' or 'thinning', got {method!r}")
+        
+    service_times = rng.exponential(MEAN_SERVICE, len(arrival_times))
+    events = lindley_kernel(np.diff(arrival_times, prepend=0.0), service_times, clock=0.0)
+    
+    # Group customers and time by window of the day
+    windows_per_day = int(round(24 * 60 / window_minutes))
+    window = (events['arrival'] // window_minutes).astype(np.int64) % windows_per_day
+    # The last window may be partial (e.g. horizon_hours=7.5), so weight by real lengths
+    boundaries = np.append(np.arange(0, horizon, window_minutes), horizon)
+    boundary_window = np.arange(len(boundaries) - 1) % windows_per_day
+    time_weight = np.diff(boundaries)
+    window_minutes_covered = np.bincount(boundary_window, weights=time_weight, minlength=windows_per_day)
+    
+    def per_minute(totals):
+        # NaN for windows of the day the horizon never reaches
+        return np.divide(totals, window_minutes_covered, out=np.full(windows_per_day, np.nan),
+                         where=window_minutes_covered > 0)
+    
+    customers = np.bincount(window, minlength=windows_per_day)
+    
+    def per_customer(values):
+        # NaN for windows without customers (e.g. a short horizon with no arrivals)
+        totals = np.bincount(window, weights=values, minlength=windows_per_day)
+        return np.divide(totals, customers, out=np.full(windows_per_day, np.nan), where=customers > 0)
+    
+    sweep = queue_length_sweep(events['arrival'], events['service_start'], events['departure'])
+    
+    def pooled(level):
+        averages = window_time_averages(sweep, level, boundaries)
+        return per_minute(np.bincount(boundary_window, weights=averages * time_weight,
+                                      minlength=windows_per_day))
+                           
+    window_start = np.arange(windows_per_day) * window_minutes
+    df = pd.DataFrame({
+        'Inicio_Ventana_Min': window_start,
+        'Tasa_Teorica': rate_function(window_start + window_minutes / 2),  # λ at window midpoint
+        'Clientes': customers,
+        'Tasa_Observada': per_minute(customers) * 60,
+        'Wq_Promedio': per_customer(events['wait']),
+        'Ws_Promedio': per_customer(events['system_time']),
+        'P_Espera': per_customer(events['wait'] > 0),
+        'Ls_Promedio': pooled(sweep['n_system']),
+        'Lq_Promedio': pooled(sweep['n_queue']),
+        'Utilizacion': pooled(np.minimum(sweep['n_system'], 1)),
+    })
+    
+    return df, events
 
 
 def calculate_statistics(df):
@@ -183,19 +1149,23 @@ def calculate_statistics(df):
     # Average time in system (Ws)
     ws_observed = df['Tiempo_En_Sistema'].mean()
     
-    # Average number in queue (Lq) - using Little's Law: Lq = λ * Wq
+    # Observed arrival rate
     lambda_observed = (NUM_CUSTOMERS - 1) / total_simulation_time * 60  # customers per hour
-    lq_observed = lambda_observed * wq_observed / 60  # convert Wq to hours
     
-    # Average number in system (Ls)
-    ls_observed = lambda_observed * ws_observed / 60
+    # Average number in queue (Lq) and in system (Ls) - exact time averages of Nq(t), N(t)
+    sweep = queue_length_sweep(df['Tiempo_Llegada'].values,
+                               df['Tiempo_Inicio_Servicio'].values,
+                               df['Tiempo_Fin_Servicio'].values)
+    lq_observed = sweep['lq']
+    ls_observed = sweep['ls']
     
     # Theoretical M/M/1 metrics
-    rho_theoretical = LAMBDA_ARRIVALS / MU_SERVICE
-    ls_theoretical = rho_theoretical / (1 - rho_theoretical)
-    lq_theoretical = rho_theoretical**2 / (1 - rho_theoretical)
-    ws_theoretical = 1 / (MU_SERVICE - LAMBDA_ARRIVALS) * 60  # in minutes
-    wq_theoretical = rho_theoretical / (MU_SERVICE - LAMBDA_ARRIVALS) * 60  # in minutes
+    theoretical = queue_theoretical_metrics(LAMBDA_ARRIVALS, MU_SERVICE)
+    rho_theoretical = theoretical['rho']
+    ls_theoretical = theoretical['ls']
+    lq_theoretical = theoretical['lq']
+    ws_theoretical = theoretical['ws']  # in minutes
+    wq_theoretical = theoretical['wq']  # in minutes
     
     stats_dict = {
         'total_customers': NUM_CUSTOMERS,
@@ -209,6 +1179,7 @@ def calculate_statistics(df):
         'lq_observed': lq_observed,
         'ws_observed': ws_observed,
         'wq_observed': wq_observed,
+        'p0_observed': sweep['p_n'][0],
         
         # Theoretical metrics
         'lambda_theoretical': LAMBDA_ARRIVALS,
@@ -218,12 +1189,26 @@ def calculate_statistics(df):
         'lq_theoretical': lq_theoretical,
         'ws_theoretical': ws_theoretical,
         'wq_theoretical': wq_theoretical,
+        'p0_theoretical': 1 - rho_theoretical,
         
         # Service statistics
         'avg_service_time': df['Tiempo_Servicio'].mean(),
         'avg_interarrival_time': df['Tiempo_Entre_Llegadas'].mean(),
     }
     
+    # Steady-state estimates: MSER-5 warm-up and batch-means CIs
+    steady_state = steady_state_analysis({
+        'arrival': df['Tiempo_Llegada'].values,
+        'service_start': df['Tiempo_Inicio_Servicio'].values,
+        'wait': df['Tiempo_En_Cola'].values,
+        'system_time': df['Tiempo_En_Sistema'].values,
+        'departure': df['Tiempo_Fin_Servicio'].values,
+    })
+    stats_dict['warmup_customers'] = steady_state['warmup_customers']
+    for key in ('rho', 'ls', 'lq', 'ws', 'wq'):
+        stats_dict[f'{key}_steady_state'] = steady_state[key]['mean']
+        stats_dict[f'{key}_ci_half_width'] = steady_state[key]['half_width']
+        
     return stats_dict
 
 
@@ -273,26 +1258,18 @@ def create_visualizations(df, stats):
     ax2.legend()
     ax2.grid(True, alpha=0.3, axis='y')
     
-    # Chart 3: Queue length over time (sample first 100 customers)
+    # Chart 3: Customers in system N(t) over the whole run
     ax3 = axes[1, 0]
-    sample_size = min(100, NUM_CUSTOMERS)
-    df_sample = df.head(sample_size)
-    
-    # Calculate queue length at each arrival
-    queue_lengths = []
-    for i, row in df_sample.iterrows():
-        arrival = row['Tiempo_Llegada']
-        # Count customers in system at this arrival
-        in_system = ((df_sample['Tiempo_Llegada'] < arrival) & 
-                     (df_sample['Tiempo_Fin_Servicio'] > arrival)).sum()
-        queue_lengths.append(in_system)
-    
-    ax3.plot(df_sample['Cliente'], queue_lengths, marker='o', markersize=3, linewidth=1)
+    sweep = queue_length_sweep(df['Tiempo_Llegada'].values,
+                               df['Tiempo_Inicio_Servicio'].values,
+                               df['Tiempo_Fin_Servicio'].values)
+    
+    ax3.step(sweep['times'], sweep['n_system'], where='post', linewidth=1)
     ax3.axhline(y=stats['ls_observed'], color='r', linestyle='--', 
                 label=f'Ls promedio: {stats["ls_observed"]:.2f}')
-    ax3.set_xlabel('Número de Cliente')
+    ax3.set_xlabel('Tiempo (minutos)')
     ax3.set_ylabel('Clientes en Sistema')
-    ax3.set_title(f'Clientes en Sistema (primeros {sample_size})')
+    ax3.set_title('Clientes en Sistema N(t)')
     ax3.legend()
     ax3.grid(True, alpha=0.3)
     
@@ -367,6 +1344,24 @@ def save_to_excel(df, stats, fig):
     print(f"✓ Archivo Excel guardado: {EXCEL_PATH}")
 
 
+def print_steady_state_ci(stats, key):
+    """
+    Print the batch-means CI for one metric and whether it covers the theory.
+    
+    Parameters:
+    -----------
+    stats : dict
+        Statistical metrics
+    key : str
+        Metric prefix (rho, ls, lq, ws or wq)
+    """
+    mean = stats[f'{key}_steady_state']
+    half_width = stats[f'{key}_ci_half_width']
+    covers = abs(mean - stats[f'{key}_theoretical']) <= half_width
+    print(f"   • Estado estable (IC {CONFIDENCE_LEVEL:.0%}): {mean:.4f} ± {half_width:.4f} "
+          f"({'incluye' if covers else 'no incluye'} el valor teórico)")
+
+
 def print_results(df, stats):
     """
     Print simulation results to console.
@@ -389,31 +1384,37 @@ def print_results(df, stats):
     print(f"   • Tiempo medio entre llegadas: {MEAN_INTERARRIVAL:.2f} minutos")
     print(f"   • Tiempo medio de servicio: {MEAN_SERVICE:.2f} minutos")
     print(f"   • Tiempo total de simulación: {stats['total_simulation_hours']:.2f} horas")
+    print(f"   • Calentamiento descartado (MSER-5): {stats['warmup_customers']} clientes")
     
     print(f"\n2. UTILIZACIÓN DEL SERVIDOR (ρ):")
     print(f"   • Observada: {stats['rho_observed']:.4f} ({stats['rho_observed']*100:.2f}%)")
     print(f"   • Teórica: {stats['rho_theoretical']:.4f} ({stats['rho_theoretical']*100:.2f}%)")
     print(f"   • Diferencia: {abs(stats['rho_observed'] - stats['rho_theoretical']):.4f}")
+    print_steady_state_ci(stats, 'rho')
     
     print(f"\n3. CLIENTES EN EL SISTEMA (Ls):")
     print(f"   • Observado: {stats['ls_observed']:.4f} clientes")
     print(f"   • Teórico: {stats['ls_theoretical']:.4f} clientes")
     print(f"   • Diferencia: {abs(stats['ls_observed'] - stats['ls_theoretical']):.4f}")
+    print_steady_state_ci(stats, 'ls')
     
     print(f"\n4. CLIENTES EN LA COLA (Lq):")
     print(f"   • Observado: {stats['lq_observed']:.4f} clientes")
     print(f"   • Teórico: {stats['lq_theoretical']:.4f} clientes")
     print(f"   • Diferencia: {abs(stats['lq_observed'] - stats['lq_theoretical']):.4f}")
+    print_steady_state_ci(stats, 'lq')
     
     print(f"\n5. TIEMPO EN EL SISTEMA (Ws):")
     print(f"   • Observado: {stats['ws_observed']:.4f} minutos")
     print(f"   • Teórico: {stats['ws_theoretical']:.4f} minutos")
     print(f"   • Diferencia: {abs(stats['ws_observed'] - stats['ws_theoretical']):.4f} minutos")
+    print_steady_state_ci(stats, 'ws')
     
     print(f"\n6. TIEMPO EN LA COLA (Wq):")
     print(f"   • Observado: {stats['wq_observed']:.4f} minutos")
     print(f"   • Teórico: {stats['wq_theoretical']:.4f} minutos")
     print(f"   • Diferencia: {abs(stats['wq_observed'] - stats['wq_theoretical']):.4f} minutos")
+    print_steady_state_ci(stats, 'wq')
     
     print("\n" + "="*80)
     print("VALIDACIÓN DE CRITERIOS DE ACEPTACIÓN")